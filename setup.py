@@ -15,11 +15,17 @@ setup(
         "mermaid-py>=0.4.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.8.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
             "pytest-cov>=4.0.0",
             "pytest-mock>=3.10.0",
+            "pytest-xdist>=3.0.0",
+            "orjson>=3.8.0",
+            "uvloop>=0.17.0; sys_platform != 'win32'",
             "responses>=0.24.0",
             "mypy>=1.5.0",
             "ruff>=0.1.0",
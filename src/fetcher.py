@@ -50,6 +50,7 @@ class ContentFetcher:
         self.session: Optional[httpx.AsyncClient] = None
         # Для rate limiting - отслеживаем время запросов
         self.request_times: list[float] = []
+        self._rate_limit_lock = asyncio.Lock()
 
         logger.info(
             f"ContentFetcher инициализирован: timeout={config.fetch_timeout}s, "
@@ -426,36 +427,39 @@ class ContentFetcher:
             logger.debug("Rate limiting отключен (llm_rate_limit <= 0)")
             return  # Отключаем rate limiting если лимит <= 0
 
-        current_time = asyncio.get_event_loop().time()
+        # Лок сериализует выдачу слотов между параллельными задачами,
+        # иначе ожидающие проснутся одновременно и превысят лимит
+        async with self._rate_limit_lock:
+            current_time = asyncio.get_event_loop().time()
 
-        # Удаляем старые временные метки (старше 60 секунд)
-        old_count = len(self.request_times)
-        self.request_times = [
-            time for time in self.request_times if current_time - time < 60
-        ]
-        removed_count = old_count - len(self.request_times)
+            # Удаляем старые временные метки (старше 60 секунд)
+            old_count = len(self.request_times)
+            self.request_times = [
+                time for time in self.request_times if current_time - time < 60
+            ]
+            removed_count = old_count - len(self.request_times)
 
-        if removed_count > 0:
-            logger.debug(
-                f"Удалено {removed_count} устаревших записей из rate limit истории"
-            )
-
-        # Если достигнут лимит запросов в минуту, ждем
-        if len(self.request_times) >= max_requests_per_minute:
-            sleep_time = 60 - (current_time - self.request_times[0])
-            if sleep_time > 0:
+            if removed_count > 0:
                 logger.debug(
-                    f"Rate limiting: ждем {sleep_time:.2f} секунд (текущий запрос: {len(self.request_times)}/{max_requests_per_minute})"
+                    f"Удалено {removed_count} устаревших записей из rate limit истории"
                 )
-                await asyncio.sleep(sleep_time)
-                # После ожидания снова проверяем лимит
-                current_time = asyncio.get_event_loop().time()
-                self.request_times = [
-                    time for time in self.request_times if current_time - time < 60
-                ]
-
-        # Добавляем текущее время запроса
-        self.request_times.append(current_time)
-        logger.debug(
-            f"Запрос добавлен в rate limit историю: {len(self.request_times)}/{max_requests_per_minute}"
-        )
+
+            # Если достигнут лимит запросов в минуту, ждем
+            if len(self.request_times) >= max_requests_per_minute:
+                sleep_time = 60 - (current_time - self.request_times[0])
+                if sleep_time > 0:
+                    logger.debug(
+                        f"Rate limiting: ждем {sleep_time:.2f} секунд (текущий запрос: {len(self.request_times)}/{max_requests_per_minute})"
+                    )
+                    await asyncio.sleep(sleep_time)
+                    # После ожидания снова проверяем лимит
+                    current_time = asyncio.get_event_loop().time()
+                    self.request_times = [
+                        time for time in self.request_times if current_time - time < 60
+                    ]
+
+            # Добавляем текущее время запроса
+            self.request_times.append(current_time)
+            logger.debug(
+                f"Запрос добавлен в rate limit историю: {len(self.request_times)}/{max_requests_per_minute}"
+            )
@@ -4,8 +4,10 @@
 Обеспечивает единообразное форматирование и конфигурацию логирования.
 """
 
+import atexit
 import logging
 import logging.handlers
+import queue
 import sys
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Optional
@@ -19,7 +21,8 @@ class LoggerManager:
     Менеджер логирования приложения.
 
     Обеспечивает централизованную настройку логирования для всех модулей.
-    Поддерживает вывод в консоль и файл с ротацией.
+    Поддерживает вывод в консоль и файл с ротацией. Запись в файл выполняется
+    в фоновом потоке через QueueListener, чтобы места логирования не ждали диск.
     """
 
     _instance: Optional["LoggerManager"] = None
@@ -44,6 +47,10 @@ class LoggerManager:
             self._loggers: dict[str, logging.Logger] = {}
             self._config: Optional[Config] = None
             self._root_logger: Optional[logging.Logger] = None
+            self._queue_handler: Optional[logging.handlers.QueueHandler] = None
+            self._queue_listener: Optional[logging.handlers.QueueListener] = None
+            # Дописываем очередь в файл до того, как logging закроет обработчики
+            atexit.register(self._stop_queue_listener)
             LoggerManager._initialized = True
 
     def setup_logging(self, config: "Config") -> None:
@@ -61,7 +68,8 @@ class LoggerManager:
             getattr(logging, config.log_level.upper(), logging.INFO)
         )
 
-        # Очищаем существующие обработчики
+        # Останавливаем предыдущий фоновый поток и очищаем существующие обработчики
+        self._stop_queue_listener()
         self._root_logger.handlers.clear()
 
         # Создаем форматтер
@@ -72,11 +80,19 @@ class LoggerManager:
         console_handler.setFormatter(formatter)
         self._root_logger.addHandler(console_handler)
 
-        # Добавляем обработчик для файла с ротацией
+        # Добавляем обработчик для файла с ротацией: записи попадают в очередь,
+        # а в файл их пишет фоновый поток QueueListener
         if config.log_file:
             file_handler = self._create_file_handler(config.log_file)
             file_handler.setFormatter(formatter)
-            self._root_logger.addHandler(file_handler)
+
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            self._queue_handler = logging.handlers.QueueHandler(log_queue)
+            self._root_logger.addHandler(self._queue_handler)
+            self._queue_listener = logging.handlers.QueueListener(
+                log_queue, file_handler, respect_handler_level=True
+            )
+            self._queue_listener.start()
 
         # Логируем информацию о настройке
         logger = self.get_logger(__name__)
@@ -98,12 +114,19 @@ class LoggerManager:
 
         return formatter
 
-    def _create_file_handler(self, log_file: str) -> logging.Handler:
+    def _create_file_handler(
+        self,
+        log_file: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ) -> logging.Handler:
         """
         Создает файловый обработчик с ротацией.
 
         Аргументы:
             log_file: Путь к файлу лога
+            max_bytes: Максимальный размер файла до ротации (по умолчанию 10 МБ)
+            backup_count: Количество резервных копий
 
         Возвращает:
             logging.Handler: Файловый обработчик с ротацией
@@ -113,16 +136,34 @@ class LoggerManager:
         # Создаем директорию для лога, если она не существует
         log_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Используем ротацию по размеру (10 МБ) с сохранением 5 резервных копий
+        # Используем ротацию по размеру (по умолчанию 10 МБ и 5 резервных копий)
         handler = logging.handlers.RotatingFileHandler(
             filename=log_path,
-            maxBytes=10 * 1024 * 1024,  # 10 МБ
-            backupCount=5,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
             encoding="utf-8",
         )
 
         return handler
 
+    def _stop_queue_listener(self) -> None:
+        """
+        Останавливает фоновую запись в файл, дописывая оставшиеся записи.
+        """
+        listener = self._queue_listener
+        if listener is None:
+            return
+
+        # Отключаем обработчик очереди, чтобы записи не копились без слушателя
+        if self._root_logger and self._queue_handler:
+            self._root_logger.removeHandler(self._queue_handler)
+        self._queue_handler = None
+
+        self._queue_listener = None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
     def get_logger(self, name: str) -> logging.Logger:
         """
         Получает логгер для указанного модуля.
@@ -272,8 +313,7 @@ def log_function_call(
         if kwargs_str:
             all_args.append(kwargs_str)
 
-        args_full = ", ".join(all_args)
-        logger.debug(f"Вызов функции: {func_name}({args_full})")
+        logger.debug("Вызов функции: %s(%s)", func_name, ", ".join(all_args))
 
 
 def log_performance(func_name: str, duration: float, details: str = "") -> None:
@@ -295,10 +335,16 @@ def log_performance(func_name: str, duration: float, details: str = "") -> None:
     """
     logger = get_logger(__name__)
 
-    details_str = f" ({details})" if details else ""
-    logger.info(
-        f"Производительность: {func_name} выполнена за {duration:.2f}с{details_str}"
-    )
+    # Сообщение форматируется только если уровень INFO включен
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    if details:
+        logger.info(
+            "Производительность: %s выполнена за %.2fс (%s)", func_name, duration, details
+        )
+    else:
+        logger.info("Производительность: %s выполнена за %.2fс", func_name, duration)
 
 
 def log_error_with_context(error: Exception, context: dict[str, Any]) -> None:
@@ -318,5 +364,10 @@ def log_error_with_context(error: Exception, context: dict[str, Any]) -> None:
     """
     logger = get_logger(__name__)
 
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+
     context_str = ", ".join(f"{k}={v}" for k, v in context.items())
-    logger.error(f"Ошибка: {type(error).__name__}: {error} | Контекст: {context_str}")
+    logger.error(
+        "Ошибка: %s: %s | Контекст: %s", type(error).__name__, error, context_str
+    )
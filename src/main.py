@@ -24,7 +24,7 @@ from src.logger import (
 )
 from src.models import Bookmark, BookmarkFolder, ProcessedPage
 from src.parser import BookmarkParser
-from src.progress import ProgressManager, calculate_config_hash
+from src.progress import PROGRESS_FORMATS, ProgressManager, calculate_config_hash
 from src.summarizer import ContentSummarizer
 from src.utils import ProgressTracker, PathUtils
 from src.writer import FileSystemWriter
@@ -32,16 +32,17 @@ from src.writer import FileSystemWriter
 # Настройка логера для модуля
 logger = get_logger(__name__)
 
+# Имя файла кеша разобранных закладок в директории вывода
+BOOKMARKS_CACHE_FILE = ".bookmarks_cache.pkl"
 
-def parse_arguments() -> argparse.Namespace:
+
+def _build_parser() -> argparse.ArgumentParser:
     """
-    Парсит аргументы командной строки.
+    Создает парсер аргументов командной строки.
 
     Возвращает:
-        argparse.Namespace: Объект с аргументами командной строки
+        argparse.ArgumentParser: Настроенный парсер аргументов
     """
-    log_function_call("parse_arguments", (), {"argv": sys.argv[1:]})
-
     parser = argparse.ArgumentParser(
         description="Утилита для экспорта и описания закладок браузера",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -84,6 +85,20 @@ def parse_arguments() -> argparse.Namespace:
         default=None
     )
 
+    parser.add_argument(
+        "--progress-format",
+        dest="progress_format",
+        choices=PROGRESS_FORMATS,
+        default="json",
+        help="Формат файла прогресса: json (по умолчанию) или компактный бинарный pickle",
+    )
+
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help="Кешировать разобранное дерево закладок в директории вывода",
+    )
+
     parser.add_argument(
         "--dry-run", action="store_true", help="Только парсинг, без обработки контента"
     )
@@ -105,7 +120,23 @@ def parse_arguments() -> argparse.Namespace:
         help="Максимальное количество параллельных запросов (переопределяет FETCH_MAX_CONCURRENT)",
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+# Парсер создается один раз при импорте и переиспользуется при каждом разборе
+_PARSER = _build_parser()
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Парсит аргументы командной строки.
+
+    Возвращает:
+        argparse.Namespace: Объект с аргументами командной строки
+    """
+    log_function_call("parse_arguments", (), {"argv": sys.argv[1:]})
+
+    args = _PARSER.parse_args()
     logger.debug(f"Аргументы командной строки разобраны: {vars(args)}")
 
     return args
@@ -162,11 +193,16 @@ def create_progress_manager(
     # Проверяем, что progress_file_path не является Mock объектом
     if hasattr(progress_file_path, '_mock_return_value'):
         progress_file_path = None
+    # Формат файла прогресса (по умолчанию человекочитаемый JSON)
+    progress_format = getattr(args, 'progress_format', "json")
+    if progress_format not in PROGRESS_FORMATS:
+        progress_format = "json"
     progress_manager = ProgressManager(
         output_dir=config.output_dir,
         bookmarks_file=bookmarks_file,
         config_hash=config_hash,
-        progress_file_path=progress_file_path
+        progress_file_path=progress_file_path,
+        progress_format=progress_format,
     )
 
     # Загружаем прогресс если нужно
@@ -298,6 +334,115 @@ async def process_single_bookmark(
         return None
 
 
+async def process_folder_bookmarks(
+    pending_bookmarks: list[tuple[int, Bookmark]],
+    folder_path: Path,
+    current_folder_path: list[str],
+    total_in_folder: int,
+    fetcher: ContentFetcher,
+    summarizer: ContentSummarizer,
+    writer: FileSystemWriter,
+    progress_manager: ProgressManager,
+    progress_tracker: ProgressTracker,
+    check_error: bool = False,
+    args: Optional[argparse.Namespace] = None,
+    max_concurrent: int = 1,
+) -> tuple[int, int]:
+    """
+    Конкурентно обрабатывает отобранные закладки одной папки.
+
+    Одновременно обрабатывается не более max_concurrent закладок. Текущая
+    позиция в прогрессе указывает на наименьший индекс среди незавершенных
+    закладок, поэтому при возобновлении прерванные закладки не пропускаются.
+    Если обработка одной из закладок завершается исключением, остальные
+    задачи отменяются.
+
+    Аргументы:
+        pending_bookmarks: Список пар (индекс в папке, закладка)
+        folder_path: Путь к папке в файловой системе
+        current_folder_path: Путь в иерархии папок
+        total_in_folder: Общее количество закладок в папке
+        fetcher: Загрузчик контента
+        summarizer: Генератор описаний
+        writer: Файловый писатель
+        progress_manager: Менеджер прогресса
+        progress_tracker: Трекер прогресса
+        check_error: Флаг режима перепроверки ошибочных URL
+        args: Аргументы командной строки
+        max_concurrent: Максимальное число одновременно обрабатываемых закладок
+
+    Возвращает:
+        tuple[int, int]: (количество обработанных, количество с ошибками)
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrent))
+    in_flight: set[int] = set()
+
+    async def process_one(index: int, bookmark: Bookmark) -> bool:
+        async with semaphore:
+            in_flight.add(index)
+            progress_tracker.update(0, bookmark.title)
+            progress_manager.update_current_position(
+                current_folder_path, min(in_flight), total_in_folder
+            )
+
+            try:
+                page = None
+                if args is not None:
+                    page = await process_single_bookmark(
+                        bookmark, fetcher, summarizer, progress_manager, current_folder_path, args
+                    )
+
+                if page:
+                    # Определяем путь для сохранения файла
+                    filename = writer._sanitize_filename(bookmark.title, parent_path=folder_path, is_folder=False, max_path_len = 250) # int((255 - len(folder_path.name)*2)/2)
+                    file_path = folder_path / filename
+
+                    if not str(file_path).endswith(".md"):
+                        file_path = file_path.with_suffix(".md")
+
+                    # Сохраняем файл до записи в прогресс
+                    writer.write_markdown(page, file_path)
+
+                    # В режиме check_error перемещаем URL из failed в processed
+                    if check_error:
+                        progress_manager.move_failed_to_processed(bookmark, str(file_path), current_folder_path)
+                    else:
+                        progress_manager.add_processed_bookmark(
+                            bookmark, str(file_path), current_folder_path
+                        )
+            finally:
+                in_flight.discard(index)
+                # Сдвигаем позицию, только если завершилась самая ранняя закладка
+                if in_flight and index < min(in_flight):
+                    progress_manager.update_current_position(
+                        current_folder_path, min(in_flight), total_in_folder
+                    )
+
+            progress_tracker.update(1)
+            return bool(page)
+
+    tasks = [
+        asyncio.ensure_future(process_one(index, bookmark))
+        for index, bookmark in pending_bookmarks
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    processed_count = sum(results)
+    # В режиме check_error не увеличиваем failed_count, так как
+    # мы только перепроверяем уже отмеченные как failed
+    failed_count = 0 if check_error else len(results) - processed_count
+    logger.debug(
+        f"Папка {'/'.join(current_folder_path)}: обработано {processed_count}, "
+        f"с ошибками {failed_count} (max_concurrent={max_concurrent})"
+    )
+    return processed_count, failed_count
+
+
 async def traverse_and_process_folder(
     folder: BookmarkFolder,
     base_path: Path,
@@ -311,6 +456,7 @@ async def traverse_and_process_folder(
     resume_position: Optional[tuple[list[str], int]] = None,
     check_error: bool = False,
     args: Optional[argparse.Namespace] = None,
+    max_concurrent: int = 1,
 ) -> tuple[int, int]:
     """
     Рекурсивно обходит папку и обрабатывает закладки.
@@ -326,6 +472,7 @@ async def traverse_and_process_folder(
         progress_tracker: Трекер прогресса
         dry_run: Флаг режима без обработки контента
         resume_position: Позиция для возобновления (путь, индекс)
+        max_concurrent: Максимальное число одновременно обрабатываемых закладок
 
     Возвращает:
         tuple[int, int]: (количество обработанных, количество с ошибками)
@@ -381,6 +528,10 @@ async def traverse_and_process_folder(
 
     # Обрабатываем закладки в текущей папке
     logger.debug(f"Начинаем обработку {len(folder.bookmarks)} закладок в папке {folder.name}")
+    pending_bookmarks: list[tuple[int, Bookmark]] = []
+    # URL, уже отобранные для обработки: закладки отбираются до завершения
+    # задач, поэтому повтор URL в папке не виден в прогрессе
+    seen_urls: set[str] = set()
     for i, bookmark in enumerate(folder.bookmarks):
         logger.debug(f"Обработка закладки {i}: {bookmark.title} ({bookmark.url}), check_error={check_error}")
         # Проверяем, является ли check_error Mock объектом
@@ -419,14 +570,14 @@ async def traverse_and_process_folder(
                         failed_count += 1
                         continue
 
-        progress_tracker.update(0, bookmark.title)
+        if dry_run:
+            progress_tracker.update(0, bookmark.title)
 
-        # Обновляем текущую позицию
-        progress_manager.update_current_position(
-            current_folder_path, i, len(folder.bookmarks)
-        )
+            # Обновляем текущую позицию
+            progress_manager.update_current_position(
+                current_folder_path, i, len(folder.bookmarks)
+            )
 
-        if dry_run:
             # В режиме dry-run с учетом resume и check_error
             processed_urls = progress_manager.get_processed_urls()
             failed_urls = progress_manager.get_failed_urls()
@@ -477,43 +628,30 @@ async def traverse_and_process_folder(
             )
             continue
 
-        # Обрабатываем закладку
-        page = None
-        if args is not None and not dry_run:
-            page = await process_single_bookmark(
-                bookmark, fetcher, summarizer, progress_manager, current_folder_path, args
-            )
-
-        if page:
-            # Определяем путь для сохранения файла
-            filename = writer._sanitize_filename(bookmark.title, parent_path=folder_path, is_folder=False, max_path_len = 250) # int((255 - len(folder_path.name)*2)/2)
-            file_path = folder_path / filename
-
-            if not str(file_path).endswith(".md"):
-                file_path = file_path.with_suffix(".md")
-
-            # Сохраняем файл
-            writer.write_markdown(page, file_path)
-
-            # В режиме check_error перемещаем URL из failed в processed
-            if check_error:
-                # Перемещаем из списка неудачных в список обработанных
-                progress_manager.move_failed_to_processed(bookmark, str(file_path), current_folder_path)
-            else:
-                # Добавляем в прогресс
-                progress_manager.add_processed_bookmark(
-                    bookmark, str(file_path), current_folder_path
-                )
-            processed_count += 1
-            logger.debug(f"Успешно обработана закладка, увеличиваем processed_count до {processed_count}")
-        elif not dry_run:
-            # В режиме check_error не увеличиваем failed_count, так как
-            # мы только перепроверяем уже отмеченные как failed
-            if not check_error:
-                failed_count += 1
-                logger.debug(f"Ошибка обработки закладки, увеличиваем failed_count до {failed_count}")
+        if bookmark.url in seen_urls:
+            logger.debug(f"Пропуск повторного URL в папке: {bookmark.url}")
+            continue
+        seen_urls.add(bookmark.url)
+        pending_bookmarks.append((i, bookmark))
 
-        progress_tracker.update(1)
+    # Загрузка и суммаризация выполняются конкурентно после отбора закладок
+    if pending_bookmarks:
+        batch_processed, batch_failed = await process_folder_bookmarks(
+            pending_bookmarks,
+            folder_path,
+            current_folder_path,
+            len(folder.bookmarks),
+            fetcher,
+            summarizer,
+            writer,
+            progress_manager,
+            progress_tracker,
+            check_error,
+            args,
+            max_concurrent,
+        )
+        processed_count += batch_processed
+        failed_count += batch_failed
 
     # Рекурсивно обрабатываем вложенные папки
     logger.debug(f"Рекурсивная обработка {len(folder.children)} вложенных папок")
@@ -531,7 +669,8 @@ async def traverse_and_process_folder(
             dry_run,
             resume_position,
             check_error,
-            args
+            args,
+            max_concurrent,
         )
         logger.debug(f"Из вложенной папки {child_folder.name} получено: processed={child_processed}, failed={child_failed}")
         processed_count += child_processed
@@ -628,7 +767,8 @@ async def process_bookmarks(
             args.dry_run,
             resume_position,
             args.check_error,
-            args
+            args,
+            config.fetch_max_concurrent,
         )
 
     # Обновляем статистику и принудительно сохраняем прогресс
@@ -650,7 +790,7 @@ async def process_bookmarks(
 
 def count_bookmarks(folder: BookmarkFolder) -> int:
     """
-    Рекурсивно подсчитывает количество закладок в папке.
+    Подсчитывает количество закладок в папке и всех вложенных папках.
 
     Аргументы:
         folder: Папка для подсчета
@@ -660,9 +800,7 @@ def count_bookmarks(folder: BookmarkFolder) -> int:
     """
     log_function_call("count_bookmarks", (folder.name,))
 
-    count = len(folder.bookmarks)
-    for child in folder.children:
-        count += count_bookmarks(child)
+    count = sum(len(current.bookmarks) for current in folder.walk())
 
     logger.debug(f"Подсчет закладок для папки '{folder.name}': {count}")
     return count
@@ -719,9 +857,13 @@ def main() -> None:
         parser = BookmarkParser()
         logger.info("Загрузка и парсинг файла закладок")
 
+        # Кеш разобранного дерева хранится рядом с результатами, а не с файлом закладок
+        cache_file = None
+        if args.parse_cache:
+            cache_file = str(Path(config.output_dir) / BOOKMARKS_CACHE_FILE)
+
         try:
-            data = parser.load_json(str(bookmarks_file))
-            root_folder = parser.parse_bookmarks(data)
+            root_folder = parser.load_bookmarks(str(bookmarks_file), cache_file=cache_file)
             total_bookmarks = count_bookmarks(root_folder)
             logger.info(f"Загружено закладок: {total_bookmarks}")
         except Exception as e:
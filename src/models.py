@@ -6,7 +6,7 @@
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import ClassVar, Iterator, Optional
 
 from typing_extensions import Literal
 
@@ -22,6 +22,12 @@ class Bookmark:
         date_added: Дата добавления закладки
     """
 
+    # Экземпляров закладок тысячи: слоты вместо __dict__ уменьшают расход памяти
+    __slots__ = ("title", "url", "date_added")
+
+    # Тег типа узла: проверка KIND дешевле isinstance при обходе дерева
+    KIND: ClassVar[Literal["url"]] = "url"
+
     title: str
     url: str
     date_added: Optional[datetime]
@@ -39,10 +45,74 @@ class BookmarkFolder:
         bookmarks: Список закладок в папке
     """
 
+    __slots__ = (
+        "name",
+        "children",
+        "bookmarks",
+        "_children_by_name",
+        "_indexed_children",
+    )
+
+    KIND: ClassVar[Literal["folder"]] = "folder"
+
     name: str
     children: list["BookmarkFolder"]
     bookmarks: list[Bookmark]
 
+    def __post_init__(self) -> None:
+        # Индекс вложенных папок по имени и число проиндексированных элементов
+        # children; не являются полями dataclass и не участвуют в сравнении
+        self._children_by_name: dict[str, BookmarkFolder] = {}
+        self._indexed_children = 0
+
+    def add_child(self, folder: "BookmarkFolder") -> None:
+        """
+        Добавляет вложенную папку и обновляет индекс по имени.
+
+        Аргументы:
+            folder: Вложенная папка
+        """
+        self.children.append(folder)
+        if self._indexed_children == len(self.children) - 1:
+            self._children_by_name.setdefault(folder.name, folder)
+            self._indexed_children += 1
+
+    def get_child(self, name: str) -> Optional["BookmarkFolder"]:
+        """
+        Возвращает первую вложенную папку с указанным именем.
+
+        Если children изменялся напрямую, индекс перестраивается
+        при следующем обращении.
+
+        Аргументы:
+            name: Название вложенной папки
+
+        Возвращает:
+            Optional[BookmarkFolder]: Папка или None, если она не найдена
+        """
+        if self._indexed_children != len(self.children):
+            self._children_by_name = {}
+            for child in self.children:
+                self._children_by_name.setdefault(child.name, child)
+            self._indexed_children = len(self.children)
+        return self._children_by_name.get(name)
+
+    def walk(self) -> Iterator["BookmarkFolder"]:
+        """
+        Обходит папку и все вложенные папки в глубину.
+
+        Обход выполняется с явным стеком, поэтому глубина вложенности
+        не ограничена лимитом рекурсии.
+
+        Возвращает:
+            Iterator[BookmarkFolder]: Папки дерева, начиная с текущей
+        """
+        stack = [self]
+        while stack:
+            folder = stack.pop()
+            yield folder
+            stack.extend(folder.children)
+
 
 @dataclass
 class ProcessedPage:
@@ -5,14 +5,31 @@
 """
 
 import json
+import mmap
+import os
+import pickle
+import sys
 from datetime import datetime
-from typing import Any, Union
+from typing import IO, Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен, при отсутствии используется json
+    orjson = None  # type: ignore[assignment]
 
 from .logger import get_logger, log_error_with_context, log_function_call
 from .models import Bookmark, BookmarkFolder
+from .utils import chrome_timestamp_to_datetime
 
 logger = get_logger(__name__)
 
+# Корневые разделы файла Chrome: имя папки в дереве и ключ в "roots"
+ROOT_SECTIONS = (
+    ("Bookmark Bar", "bookmark_bar"),
+    ("Other", "other"),
+    ("Mobile", "synced"),
+)
+
 
 class BookmarkParser:
     """
@@ -20,12 +37,15 @@ class BookmarkParser:
     Строит древовидную структуру папок и закладок.
     """
 
-    def load_json(self, file_path: str) -> dict[str, Any]:
+    def load_json(
+        self, file_path: Union[str, bytes, bytearray, IO[bytes]]
+    ) -> dict[str, Any]:
         """
         Загружает и валидирует JSON-файл закладок.
 
         Аргументы:
-            file_path: Путь к JSON-файлу закладок
+            file_path: Путь к JSON-файлу закладок, его содержимое в байтах
+                или бинарный файловый объект
 
         Возвращает:
             dict: Словарь с данными закладок
@@ -35,25 +55,46 @@ class BookmarkParser:
             json.JSONDecodeError: Если файл содержит некорректный JSON
             ValueError: Если структура JSON некорректна
         """
-        log_function_call("load_json", (file_path,))
+        if isinstance(file_path, (bytes, bytearray)):
+            source_name = "<bytes>"
+        elif hasattr(file_path, "read"):
+            source_name = str(getattr(file_path, "name", "<stream>"))
+        else:
+            source_name = str(file_path)
 
-        logger.info(f"Загрузка JSON-файла закладок: {file_path}")
+        log_function_call("load_json", (source_name,))
+
+        logger.info(f"Загрузка JSON-файла закладок: {source_name}")
 
         try:
-            with open(file_path, encoding="utf-8") as file:
-                data = json.load(file)
-            logger.debug(f"Файл успешно открыт и прочитан: {file_path}")
+            # Содержимое читается целиком как байты: orjson разбирает UTF-8
+            # напрямую, без промежуточного декодирования в строку
+            if isinstance(file_path, (bytes, bytearray)):
+                data = self._decode_json(file_path)
+            elif hasattr(file_path, "read"):
+                data = self._decode_json(file_path.read())
+            else:
+                with open(file_path, "rb") as file:
+                    if orjson is not None and os.fstat(file.fileno()).st_size:
+                        # Файл отображается в память и разбирается без копирования в bytes
+                        with mmap.mmap(
+                            file.fileno(), 0, access=mmap.ACCESS_READ
+                        ) as mapped, memoryview(mapped) as view:
+                            data = orjson.loads(view)
+                    else:
+                        data = self._decode_json(file.read())
+            logger.debug(f"Файл успешно открыт и прочитан: {source_name}")
         except FileNotFoundError:
             log_error_with_context(
-                FileNotFoundError(f"Файл не найден: {file_path}"),
-                {"file_path": file_path, "operation": "load_json"},
+                FileNotFoundError(f"Файл не найден: {source_name}"),
+                {"file_path": source_name, "operation": "load_json"},
             )
             raise
         except json.JSONDecodeError as e:
             log_error_with_context(
                 e,
                 {
-                    "file_path": file_path,
+                    "file_path": source_name,
                     "operation": "json_parse",
                     "error_line": e.lineno,
                 },
@@ -70,61 +111,77 @@ class BookmarkParser:
             validation_errors.append("Поле 'roots' должно быть словарем")
 
         if validation_errors:
-            error_msg = f"Некорректная структура JSON в файле {file_path}: {'; '.join(validation_errors)}"
+            error_msg = f"Некорректная структура JSON в файле {source_name}: {'; '.join(validation_errors)}"
             log_error_with_context(
                 ValueError(error_msg),
-                {"file_path": file_path, "validation_errors": validation_errors},
+                {"file_path": source_name, "validation_errors": validation_errors},
             )
             raise ValueError(error_msg)
 
-        logger.info(f"Файл JSON успешно загружен и валидирован: {file_path}")
+        logger.info(f"Файл JSON успешно загружен и валидирован: {source_name}")
         logger.debug(
             f"Структура JSON содержит корневые разделы: {list(data['roots'].keys())}"
         )
         return data  # type: ignore[no-any-return]
 
-    def parse_bookmarks(self, data: dict[str, Any]) -> BookmarkFolder:
+    @staticmethod
+    def _decode_json(content: Union[bytes, bytearray]) -> Any:
+        """
+        Разбирает JSON из байтов через orjson, если он установлен, иначе через json.
+
+        Аргументы:
+            content: Содержимое JSON-файла в кодировке UTF-8
+
+        Возвращает:
+            Any: Разобранные данные
+
+        Raises:
+            json.JSONDecodeError: Если содержимое не является корректным JSON
+        """
+        return orjson.loads(content) if orjson is not None else json.loads(content)
+
+    def parse_bookmarks(
+        self, data: dict[str, Any], consume: bool = False
+    ) -> BookmarkFolder:
         """
         Парсит структуру закладок и возвращает корневую папку.
 
         Аргументы:
             data: Словарь с данными закладок (результат load_json)
+            consume: Извлекать дочерние узлы из data по мере обхода, чтобы
+                разобранные части JSON освобождались до окончания парсинга
+                (словарь data при этом изменяется)
 
         Возвращает:
             BookmarkFolder: Корневая папка с закладками
         """
-        log_function_call("parse_bookmarks", (data,))
+        # В лог передаются только ключи: строковое представление всего
+        # словаря закладок сопоставимо по размеру с исходным файлом
+        log_function_call("parse_bookmarks", (list(data),))
 
         logger.info("Начало парсинга структуры закладок")
 
-        roots = data.get("roots", {})
+        roots = data.pop("roots", {}) if consume else data.get("roots", {})
         logger.debug(f"Найдены корневые разделы: {list(roots.keys())}")
 
-        # Обрабатываем каждый из корневых узлов
-        bookmark_bar = roots.get("bookmark_bar", {})
-        other = roots.get("other", {})
-        synced = roots.get("synced", {})
-
         root_folder = BookmarkFolder(name="Root", children=[], bookmarks=[])
 
-        # Обработка корневых папок
-        root_sections = [
-            ("Bookmark Bar", bookmark_bar),
-            ("Other", other),
-            ("Mobile", synced),
-        ]
+        # Обработка корневых папок: в режиме consume раздел извлекается из
+        # roots, и его узлы JSON освобождаются сразу после обхода раздела
+        get_section = roots.pop if consume else roots.get
 
-        for folder_name, folder_data in root_sections:
+        for folder_name, section_key in ROOT_SECTIONS:
+            folder_data = get_section(section_key, {})
             if folder_data:
                 logger.debug(f"Обработка корневого раздела: {folder_name}")
-                folder = self._traverse_node(folder_data, folder_name)
+                folder = self._traverse_node(folder_data, folder_name, consume)
                 if folder:
-                    if isinstance(folder, BookmarkFolder):
-                        root_folder.children.append(folder)
+                    if folder.KIND == "folder":
+                        root_folder.add_child(folder)
                         logger.debug(
                             f"Добавлена папка: {folder.name} с {len(folder.children)} подпапками и {len(folder.bookmarks)} закладками"
                         )
-                    elif isinstance(folder, Bookmark):
+                    else:
                         root_folder.bookmarks.append(folder)
                         logger.debug(f"Добавлена закладка: {folder.title}")
 
@@ -136,19 +193,184 @@ class BookmarkParser:
 
         return root_folder
 
+    def load_bookmarks(
+        self, file_path: str, cache_file: Optional[str] = None
+    ) -> BookmarkFolder:
+        """
+        Загружает и парсит файл закладок с необязательным кешированием результата.
+
+        Кеш хранит дерево закладок в формате pickle вместе с путем, размером
+        и временем изменения исходного файла и используется только при их
+        совпадении, поэтому повторные запуски на неизменном файле пропускают
+        разбор JSON и построение дерева.
+
+        Аргументы:
+            file_path: Путь к JSON-файлу закладок
+            cache_file: Путь к файлу кеша (None - без кеширования)
+
+        Возвращает:
+            BookmarkFolder: Корневая папка с закладками
+        """
+        log_function_call("load_bookmarks", (file_path,), {"cache_file": cache_file})
+
+        if not cache_file:
+            return self.parse_bookmarks(self.load_json(file_path), consume=True)
+
+        source_stat = os.stat(file_path)
+        source_key = (
+            os.path.abspath(file_path),
+            source_stat.st_size,
+            source_stat.st_mtime_ns,
+        )
+
+        cached = self._load_cache(cache_file, source_key)
+        if cached is not None:
+            logger.info(f"Дерево закладок загружено из кеша: {cache_file}")
+            return cached
+
+        root_folder = self.parse_bookmarks(self.load_json(file_path), consume=True)
+        self._save_cache(cache_file, source_key, root_folder)
+        return root_folder
+
+    def _load_cache(
+        self, cache_file: str, source_key: tuple[str, int, int]
+    ) -> Optional[BookmarkFolder]:
+        """
+        Загружает дерево закладок из кеша, если он соответствует исходному файлу.
+
+        Аргументы:
+            cache_file: Путь к файлу кеша
+            source_key: Путь, размер и время изменения исходного файла
+
+        Возвращает:
+            Optional[BookmarkFolder]: Дерево закладок или None, если кеш недействителен
+        """
+        if not os.path.exists(cache_file):
+            return None
+
+        try:
+            with open(cache_file, "rb") as file:
+                cached = pickle.load(file)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать кеш закладок {cache_file}: {e}")
+            return None
+
+        if (
+            not isinstance(cached, dict)
+            or cached.get("source_key") != source_key
+            or not isinstance(cached.get("root"), BookmarkFolder)
+        ):
+            logger.debug(f"Кеш закладок устарел: {cache_file}")
+            return None
+
+        return cached["root"]  # type: ignore[no-any-return]
+
+    def _save_cache(
+        self,
+        cache_file: str,
+        source_key: tuple[str, int, int],
+        root_folder: BookmarkFolder,
+    ) -> None:
+        """
+        Сохраняет дерево закладок в кеш.
+
+        Аргументы:
+            cache_file: Путь к файлу кеша
+            source_key: Путь, размер и время изменения исходного файла
+            root_folder: Корневая папка с закладками
+        """
+        temp_file = f"{cache_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+            with open(temp_file, "wb") as file:
+                pickle.dump(
+                    {"source_key": source_key, "root": root_folder}, file, protocol=5
+                )
+            os.replace(temp_file, cache_file)
+            logger.debug(f"Дерево закладок сохранено в кеш: {cache_file}")
+        except Exception as e:
+            log_error_with_context(
+                e, {"cache_file": cache_file, "operation": "save_bookmarks_cache"}
+            )
+
     def _traverse_node(
-        self, node: dict[str, Any], default_name: str = "Untitled"
+        self, node: dict[str, Any], default_name: str = "Untitled", consume: bool = False
     ) -> Union[BookmarkFolder, Bookmark, None]:
         """
-        Рекурсивно обходит узел закладок и возвращает BookmarkFolder или Bookmark.
+        Обходит узел закладок и возвращает BookmarkFolder или Bookmark.
+
+        Обход выполняется итеративно с явным стеком: глубина вложенности
+        папок не ограничена лимитом рекурсии, а порядок дочерних элементов
+        сохраняется.
 
         Аргументы:
             node: Узел из JSON-файла закладок
             default_name: Имя по умолчанию для узла
+            consume: Извлекать списки дочерних узлов из node, чтобы
+                обработанные узлы JSON освобождались во время обхода
 
         Возвращает:
             BookmarkFolder или Bookmark: Объект модели закладки или папки
         """
+        root = self._build_node(node, default_name)
+        if root is None or root.KIND != "folder":
+            return root
+
+        get_children = dict.pop if consume else dict.get
+        root_children = get_children(node, "children", None)
+        if not root_children:
+            return root
+
+        # Методы, вызываемые для каждого узла, связываются с локальными именами
+        build_node = self._build_node
+
+        # Стек пар (папка, дочерние узлы JSON), ожидающих обработки
+        stack: list[tuple[BookmarkFolder, list[dict[str, Any]]]] = [
+            (root, root_children)
+        ]
+        push = stack.append
+        pop = stack.pop
+        while stack:
+            folder, child_nodes = pop()
+            logger.debug(
+                f"Обработка папки '{folder.name}' с {len(child_nodes)} дочерними элементами"
+            )
+
+            for i, child in enumerate(child_nodes):
+                parsed_child = build_node(child)
+                if parsed_child is None:
+                    logger.debug(f"  [{i}] Пропущен пустой дочерний элемент")
+                elif parsed_child.KIND == "folder":
+                    folder.add_child(parsed_child)
+                    # Пустые папки уже готовы и в стек не помещаются
+                    grandchildren = get_children(child, "children", None)
+                    if grandchildren:
+                        push((parsed_child, grandchildren))
+                    logger.debug(f"  [{i}] Добавлена подпапка: {parsed_child.name}")
+                else:
+                    folder.bookmarks.append(parsed_child)
+                    logger.debug(f"  [{i}] Добавлена закладка: {parsed_child.title}")
+
+            logger.debug(
+                f"Создана папка '{folder.name}': {len(folder.children)} подпапок, "
+                f"{len(folder.bookmarks)} закладок"
+            )
+
+        return root
+
+    def _build_node(
+        self, node: dict[str, Any], default_name: str = "Untitled"
+    ) -> Union[BookmarkFolder, Bookmark, None]:
+        """
+        Создает объект модели для одного узла без обработки его дочерних элементов.
+
+        Аргументы:
+            node: Узел из JSON-файла закладок
+            default_name: Имя по умолчанию для узла
+
+        Возвращает:
+            BookmarkFolder (пустая папка), Bookmark или None для пропускаемых узлов
+        """
         node_type = node.get("type", "").lower()
         title = node.get("name", default_name) or default_name
 
@@ -164,70 +386,82 @@ class BookmarkParser:
             logger.debug(f"Пропуск пустого узла: type={node_type}, title={title}")
             return None
 
-        # Если это папка
-        if node_type == "folder":
-            children = []
-            bookmarks = []
-
-            # Обрабатываем дочерние элементы
-            child_nodes = node.get("children", [])
-            logger.debug(
-                f"Обработка папки '{title}' с {len(child_nodes)} дочерними элементами"
+        # Создание объекта выбирается по типу узла одним поиском в словаре
+        builder = self._NODE_BUILDERS.get(node_type)
+        if builder is None:
+            logger.warning(
+                f"Неизвестный тип узла закладки: {node_type}, заголовок: {title}"
             )
+            return None
+        return builder(self, node, title)
 
-            for i, child in enumerate(child_nodes):
-                parsed_child = self._traverse_node(child)
-                if parsed_child:
-                    if isinstance(parsed_child, BookmarkFolder):
-                        children.append(parsed_child)
-                        logger.debug(f"  [{i}] Добавлена подпапка: {parsed_child.name}")
-                    elif isinstance(parsed_child, Bookmark):
-                        bookmarks.append(parsed_child)
-                        logger.debug(
-                            f"  [{i}] Добавлена закладка: {parsed_child.title}"
-                        )
-                else:
-                    logger.debug(f"  [{i}] Пропущен пустой дочерний элемент")
+    def _build_folder(self, node: dict[str, Any], title: str) -> BookmarkFolder:
+        """
+        Создает пустую папку для узла типа "folder".
 
-            folder = BookmarkFolder(name=title, children=children, bookmarks=bookmarks)
-            logger.debug(
-                f"Создана папка '{title}': {len(children)} подпапок, {len(bookmarks)} закладок"
-            )
-            return folder
-
-        # Если это закладка
-        elif node_type == "url":
-            url = node.get("url", "")
-            if not url:
-                logger.warning(f"Найдена закладка без URL: {title}")
-                return None
-
-            # Преобразуем дату добавления из строки в datetime
-            date_added_str = node.get("date_added", "")
-            date_added = None
-            if date_added_str:
+        Имена папок интернируются, так как многократно повторяются в путях
+        иерархии при обработке и возобновлении.
+
+        Аргументы:
+            node: Узел из JSON-файла закладок
+            title: Название папки
+
+        Возвращает:
+            BookmarkFolder: Папка без дочерних элементов
+        """
+        return BookmarkFolder(name=sys.intern(title), children=[], bookmarks=[])
+
+    def _build_bookmark(self, node: dict[str, Any], title: str) -> Optional[Bookmark]:
+        """
+        Создает закладку для узла типа "url".
+
+        Аргументы:
+            node: Узел из JSON-файла закладок
+            title: Название закладки
+
+        Возвращает:
+            Optional[Bookmark]: Закладка или None, если у узла нет URL
+        """
+        url = node.get("url", "")
+        if not url:
+            logger.warning(f"Найдена закладка без URL: {title}")
+            return None
+
+        # Преобразуем дату добавления из строки в datetime
+        date_added_str = node.get("date_added", "")
+        # Единственная точка создания Bookmark: date_added всегда datetime
+        # или None (дата отсутствует либо некорректна), других типов нет
+        date_added: Optional[datetime] = None
+        if date_added_str:
+            if isinstance(date_added_str, str) and not date_added_str.isdigit():
+                # Нечисловая метка отбрасывается проверкой, без возбуждения
+                # и перехвата исключения в int()
+                logger.warning(
+                    f"Невозможно преобразовать дату добавления для закладки '{title}': {date_added_str}, ошибка: метка не является числом"
+                )
+            else:
                 try:
-                    # Chrome использует формат времени в микросекундах с 1 января 1601 года
-                    # Преобразуем в формат Unix timestamp (с 1 января 1970 года)
-                    # Chrome время - это количество микросекунд с 1601 года
-                    # Разница между 1601 и 1970 годами в микросекундах: 1164447360000
-                    chrome_timestamp = int(date_added_str)
-                    unix_timestamp = (chrome_timestamp - 1164447360000) / 100000.0
-                    date_added = datetime.fromtimestamp(unix_timestamp)
+                    date_added = chrome_timestamp_to_datetime(date_added_str)
                     logger.debug(
                         f"Преобразована дата добавления для '{title}': {date_added}"
                     )
-                except (ValueError, OSError) as e:
+                except (ValueError, OverflowError, OSError) as e:
                     logger.warning(
                         f"Невозможно преобразовать дату добавления для закладки '{title}': {date_added_str}, ошибка: {e}"
                     )
 
-            bookmark = Bookmark(title=title, url=url, date_added=date_added)
-            logger.debug(f"Создана закладка: {title} -> {url}")
-            return bookmark
-
-        else:
-            logger.warning(
-                f"Неизвестный тип узла закладки: {node_type}, заголовок: {title}"
-            )
-            return None
+        bookmark = Bookmark(title=title, url=url, date_added=date_added)
+        logger.debug(f"Создана закладка: {title} -> {url}")
+        return bookmark
+
+    # Методы создания объектов модели по типу узла JSON
+    _NODE_BUILDERS: dict[
+        str,
+        Callable[
+            ["BookmarkParser", dict[str, Any], str],
+            Union[BookmarkFolder, Bookmark, None],
+        ],
+    ] = {
+        "folder": _build_folder,
+        "url": _build_bookmark,
+    }
@@ -4,13 +4,27 @@
 Обеспечивает сохранение и восстановление состояния обработки.
 """
 
+import hashlib
 import json
+import os
+import pickle
+import sys
 import threading
 import time
-from dataclasses import asdict, dataclass
+import uuid
+from dataclasses import dataclass, fields
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from types import ModuleType
+from typing import AbstractSet, Any, Iterator, Optional, Sequence
+
+# Тип объявлен заранее, чтобы ветки без orjson проверялись mypy,
+# а не считались недостижимыми
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # orjson необязателен, при отсутствии используется json
+    orjson = None
 
 from .logger import (
     get_logger,
@@ -19,12 +33,106 @@ from .logger import (
     log_performance,
 )
 from .models import Bookmark
-from .utils import HashUtils
 
 logger = get_logger(__name__)
 
+# Поддерживаемые форматы файла прогресса: человекочитаемый JSON
+# и компактный бинарный pickle (protocol 5) для внутреннего использования
+PROGRESS_FORMATS = ("json", "pickle")
+PROGRESS_FILE_NAMES = {"json": "progress.json", "pickle": "progress.pkl"}
+
+# Расширение журнала изменений (JSON Lines), дополняющего файл прогресса
+PROGRESS_JOURNAL_SUFFIX = ".jsonl"
+
+# Журнал объединяется со снимком, когда число его записей достигает числа
+# записей в состоянии (но не раньше этого порога): суммарный объем записи
+# остается линейным, а журнал не растет без ограничений между снимками
+PROGRESS_JOURNAL_COMPACT_MIN_RECORDS = 1000
+
+# Записи журнала об удалении: в журнал пишется только URL
+_JOURNAL_REMOVAL_KINDS = ("remove_failed", "remove_processed_error")
+
+# Записи прогресса создаются для каждой закладки: начиная с Python 3.10
+# они хранят поля в слотах, без словаря атрибутов у каждого экземпляра
+_DATACLASS_SLOTS: dict[str, bool] = (
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+)
+
+# Параметры конфигурации, влияющие на совместимость сохраненного прогресса
+CONFIG_HASH_FIELDS = (
+    "llm_model",
+    "llm_max_tokens",
+    "llm_temperature",
+    "output_dir",
+    "markdown_include_metadata",
+    "generate_mermaid_diagram",
+)
+
 
-@dataclass
+def _loads_json(content: bytes) -> Any:
+    """
+    Разбирает JSON из байтов через orjson, если он установлен, иначе через json.
+
+    Аргументы:
+        content: JSON в кодировке UTF-8
+
+    Возвращает:
+        Any: Разобранные данные
+
+    Raises:
+        ValueError: Если содержимое не является корректным JSON
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _dumps_json_line(record: dict[str, Any]) -> bytes:
+    """
+    Сериализует запись журнала в одну строку JSON Lines.
+
+    Аргументы:
+        record: Запись журнала
+
+    Возвращает:
+        bytes: Строка JSON с завершающим переводом строки
+    """
+    if orjson is not None:
+        line: bytes = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        return line
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class _SetUnionView(AbstractSet[str]):
+    """
+    Объединение двух множеств URL без копирования элементов.
+
+    Проверка принадлежности выполняется за O(1), а представление отражает
+    последующие изменения исходных множеств.
+    """
+
+    __slots__ = ("_first", "_second")
+
+    def __init__(self, first: AbstractSet[str], second: AbstractSet[str]):
+        self._first = first
+        self._second = second
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._first or item in self._second
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._first
+        for item in self._second:
+            if item not in self._first:
+                yield item
+
+    def __len__(self) -> int:
+        return len(self._first) + sum(
+            1 for item in self._second if item not in self._first
+        )
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class ProcessedBookmark:
     """
     Информация об обработанной закладке.
@@ -34,11 +142,11 @@ class ProcessedBookmark:
     title: str
     processed_at: str
     file_path: Optional[str] = None
-    folder_path: Optional[list[str]] = None
+    folder_path: Optional[Sequence[str]] = None
     error: Optional[str] = None # Поле для хранения ошибки, если закладка была обработана с ошибкой
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class FailedBookmark:
     """
     Информация о закладке с ошибкой.
@@ -48,10 +156,10 @@ class FailedBookmark:
     title: str
     failed_at: str
     error: str
-    folder_path: Optional[list[str]] = None
+    folder_path: Optional[Sequence[str]] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class CurrentPosition:
     """
     Текущая позиция в обработке.
@@ -62,7 +170,7 @@ class CurrentPosition:
     total_in_folder: int
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ProgressStatistics:
     """
     Статистика прогресса обработки.
@@ -76,15 +184,51 @@ class ProgressStatistics:
     last_update: str
 
 
+# Имена полей записей прогресса для сериализации без dataclasses.asdict
+_RECORD_FIELDS: dict[type, tuple[str, ...]] = {
+    cls: tuple(field.name for field in fields(cls))
+    for cls in (ProcessedBookmark, FailedBookmark, CurrentPosition, ProgressStatistics)
+}
+
+
+def _record_to_dict(record: Any) -> dict[str, Any]:
+    """
+    Преобразует запись прогресса в словарь для сериализации.
+
+    В отличие от dataclasses.asdict, значения полей не копируются
+    рекурсивно: записи содержат только строки, числа и списки строк.
+
+    Аргументы:
+        record: Запись прогресса (экземпляр dataclass из этого модуля)
+
+    Возвращает:
+        dict: Словарь полей записи
+    """
+    return {name: getattr(record, name) for name in _RECORD_FIELDS[type(record)]}
+
+
 class ProgressManager:
     """
     Менеджер прогресса обработки закладок.
 
     Обеспечивает сохранение и восстановление состояния обработки,
     периодическое сохранение прогресса и атомарные операции.
+
+    Полное состояние (снимок) записывается в файл прогресса при
+    принудительном сохранении. Периодические сохранения между снимками
+    дописывают в журнал изменений только новые записи и удаления, поэтому
+    объем записи не растет с числом уже обработанных закладок. Когда журнал
+    становится длиннее состояния, он объединяется с новым снимком.
     """
 
-    def __init__(self, output_dir: str, bookmarks_file: str, config_hash: str, progress_file_path: Optional[str] = None):
+    def __init__(
+        self,
+        output_dir: str,
+        bookmarks_file: str,
+        config_hash: str,
+        progress_file_path: Optional[str] = None,
+        progress_format: str = "json",
+    ):
         """
         Инициализация менеджера прогресса.
 
@@ -93,40 +237,141 @@ class ProgressManager:
             bookmarks_file: Путь к файлу закладок
             config_hash: Хеш конфигурации для проверки совместимости
             progress_file_path: Путь к файлу прогресса (опционально)
+            progress_format: Формат файла прогресса ("json" или "pickle")
+
+        Raises:
+            ValueError: Если указан неподдерживаемый формат файла прогресса
         """
         log_function_call(
             "ProgressManager.__init__",
             (output_dir, bookmarks_file),
-            {"config_hash": config_hash, "progress_file_path": progress_file_path},
+            {
+                "config_hash": config_hash,
+                "progress_file_path": progress_file_path,
+                "progress_format": progress_format,
+            },
         )
 
+        if progress_format not in PROGRESS_FORMATS:
+            raise ValueError(
+                f"Неподдерживаемый формат файла прогресса: {progress_format}"
+            )
+
         self.output_dir = Path(output_dir)
         self.bookmarks_file = bookmarks_file
         self.config_hash = config_hash
+        self.progress_format = progress_format
         
         # Используем указанный файл прогресса или создаем стандартный путь
         if progress_file_path:
             self.progress_file = Path(progress_file_path)
         else:
-            self.progress_file = self.output_dir / "progress.json"
+            self.progress_file = (
+                self.output_dir / PROGRESS_FILE_NAMES[progress_format]
+            )
         
         self.lock_file = self.output_dir / "progress.lock"
+        self.journal_file = self.progress_file.with_suffix(PROGRESS_JOURNAL_SUFFIX)
+        # Временный файл для атомарной записи снимка
+        self._temp_file = self.progress_file.with_suffix(".tmp")
+
+        # Данные прогресса: по одной записи на URL в порядке последнего
+        # изменения, проверка принадлежности URL выполняется за O(1)
+        self._processed: dict[str, ProcessedBookmark] = {}
+        self._failed: dict[str, FailedBookmark] = {}
+
+        # Разбиение обработанных URL на успешные и с ошибкой
+        self._processed_url_set: set[str] = set()
+        self._processed_error_url_set: set[str] = set()
+
+        # Пул путей папок: закладки из одной папки разделяют один кортеж
+        self._folder_path_pool: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+        # Записи, добавленные после последнего сохранения: пары (тип, запись)
+        self._pending: list[tuple[str, Any]] = []
+        # Идентификатор снимка, к которому относится журнал изменений
+        self._snapshot_id: Optional[str] = None
+        # Журнал на диске относится к текущему снимку и может дополняться
+        self._journal_valid = False
+        # Число записей в журнале на диске (для решения об объединении)
+        self._journal_records = 0
+        # Следующее сохранение должно быть полным снимком: состояние еще
+        # не записано или журнал очищен вместе с файлом прогресса
+        self._needs_snapshot = True
 
-        # Данные прогресса
-        self.processed_bookmarks: list[ProcessedBookmark] = []
-        self.failed_bookmarks: list[FailedBookmark] = []
         self.current_position: Optional[CurrentPosition] = None
         self.statistics: Optional[ProgressStatistics] = None
 
         # Настройки сохранения
         self.save_interval = 10  # Сохранять каждые 10 закладок
+        # Минимальный промежуток между периодическими сохранениями, сек.:
+        # изменения, накопленные за это окно, записываются одной операцией
+        self.flush_interval = 1.0
+        # Размер пакета, при котором сохранение выполняется, не дожидаясь окна
+        self.max_batch = 100
         self.last_save_count = 0
+        self._last_save_time = 0.0
 
-        # Блокировка для потокобезопасности
-        self._lock = threading.Lock()
+        # Блокировка для потокобезопасности; реентерабельна, так как методы,
+        # изменяющие списки, вызывают save_progress под блокировкой
+        self._lock = threading.RLock()
 
         logger.info(f"ProgressManager инициализирован: {self.progress_file}")
 
+    @property
+    def processed_bookmarks(self) -> list[ProcessedBookmark]:
+        """Список обработанных закладок (копия, записи хранятся по URL)."""
+        return list(self._processed.values())
+
+    @processed_bookmarks.setter
+    def processed_bookmarks(self, items: list[ProcessedBookmark]) -> None:
+        self._processed = {}
+        self._processed_url_set = set()
+        self._processed_error_url_set = set()
+        for item in items:
+            self._append_processed(item)
+
+    @property
+    def failed_bookmarks(self) -> list[FailedBookmark]:
+        """Список закладок с ошибками (копия, записи хранятся по URL)."""
+        return list(self._failed.values())
+
+    @failed_bookmarks.setter
+    def failed_bookmarks(self, items: list[FailedBookmark]) -> None:
+        self._failed = {}
+        for item in items:
+            self._append_failed(item)
+
+    def _append_processed(self, processed: ProcessedBookmark) -> None:
+        """Добавляет или заменяет обработанную закладку и обновляет индекс URL."""
+        url = processed.url
+        # Повторная запись URL заменяет прежнюю и переносится в конец
+        self._processed.pop(url, None)
+        self._processed[url] = processed
+        if processed.error:
+            self._processed_url_set.discard(url)
+            self._processed_error_url_set.add(url)
+        else:
+            self._processed_error_url_set.discard(url)
+            self._processed_url_set.add(url)
+
+    def _append_failed(self, failed: FailedBookmark) -> None:
+        """Добавляет или заменяет закладку с ошибкой."""
+        self._failed.pop(failed.url, None)
+        self._failed[failed.url] = failed
+
+    def _remove_failed(self, url: str) -> bool:
+        """Удаляет закладку из списка неудачных, если URL в нем есть."""
+        return self._failed.pop(url, None) is not None
+
+    def _remove_processed_error(self, url: str) -> bool:
+        """Удаляет обработанную с ошибкой запись URL, если она есть."""
+        if url not in self._processed_error_url_set:
+            return False
+        del self._processed[url]
+        self._processed_error_url_set.discard(url)
+        return True
+
     def load_progress(self) -> bool:
         """
         Загружает прогресс из файла.
@@ -137,66 +382,65 @@ class ProgressManager:
         start_time = time.time()
         log_function_call("ProgressManager.load_progress", ())
 
-        if not self.progress_file.exists():
+        snapshot_exists = self.progress_file.exists()
+        if not snapshot_exists and not self.journal_file.exists():
             logger.debug(f"Файл прогресса не найден: {self.progress_file}")
             return False
 
         try:
             with self._lock:
-                with open(self.progress_file, encoding="utf-8") as f:
-                    data = json.load(f)
-
-                # Проверка версии
-                if data.get("version") != "1.0":
-                    logger.warning(
-                        f"Несовместимая версия прогресса: {data.get('version')}"
-                    )
-                    return False
-
-                # Проверка конфигурации
-                if data.get("config_hash") != self.config_hash:
-                    logger.warning(
-                        "Хеш конфигурации не совпадает, прогресс несовместим"
-                    )
-                    return False
-
-                # Проверка файла закладок
-                if data.get("bookmarks_file") != self.bookmarks_file:
-                    logger.warning("Файл закладок не совпадает, прогресс несовместим")
+                snapshot_id: Optional[str] = None
+                if snapshot_exists:
+                    data = self._read_progress_data()
+                    if not self._is_compatible(data):
+                        return False
+
+                    # Загрузка обработанных закладок
+                    processed_items: list[dict[str, Any]] = data.get("processed_urls", [])
+                    processed_bookmarks = [
+                        ProcessedBookmark(**item) for item in processed_items
+                    ]
+                    for processed in processed_bookmarks:
+                        processed.folder_path = self._intern_folder_path(
+                            processed.folder_path
+                        )
+                    self.processed_bookmarks = processed_bookmarks
+
+                    # Загрузка неудачных закладок
+                    failed_items: list[dict[str, Any]] = data.get("failed_urls", [])
+                    failed_bookmarks = [FailedBookmark(**item) for item in failed_items]
+                    for failed in failed_bookmarks:
+                        failed.folder_path = self._intern_folder_path(failed.folder_path)
+                    self.failed_bookmarks = failed_bookmarks
+
+                    # Загрузка текущей позиции и статистики
+                    self._load_state(data)
+                    snapshot_id = data.get("snapshot_id")
+
+                # Изменения, сохраненные в журнал после снимка
+                replayed, intact = self._replay_journal(snapshot_id)
+                if not snapshot_exists and replayed is None:
                     return False
 
-                # Загрузка обработанных закладок
-                processed_items: list[dict[str, Any]] = data.get("processed_urls", [])
-                self.processed_bookmarks = [
-                    ProcessedBookmark(**item) for item in processed_items
-                ]
-
-                # Загрузка неудачных закладок
-                failed_items: list[dict[str, Any]] = data.get("failed_urls", [])
-                self.failed_bookmarks = [
-                    FailedBookmark(**item) for item in failed_items
-                ]
-
-                # Загрузка текущей позиции
-                pos_data = data.get("current_position")
-                if pos_data:
-                    self.current_position = CurrentPosition(**pos_data)
-
-                # Загрузка статистики
-                stats_data = data.get("statistics")
-                if stats_data:
-                    self.statistics = ProgressStatistics(**stats_data)
+                self._snapshot_id = snapshot_id
+                # Журнал с поврежденной записью нельзя дописывать: записи после
+                # нее не будут применены при следующей загрузке. Загруженное
+                # состояние записывается новым снимком, который заменяет журнал
+                self._journal_valid = replayed is not None and intact
+                self._journal_records = replayed or 0
+                self._needs_snapshot = not intact
+                self._pending = []
 
                 duration = time.time() - start_time
                 log_performance(
                     "ProgressManager.load_progress",
                     duration,
-                    f"processed={len(self.processed_bookmarks)}, failed={len(self.failed_bookmarks)}",
+                    f"processed={len(self._processed)}, failed={len(self._failed)}",
                 )
 
                 logger.info(
-                    f"Прогресс загружен: {len(self.processed_bookmarks)} обработано, "
-                    f"{len(self.failed_bookmarks)} с ошибками"
+                    f"Прогресс загружен: {len(self._processed)} обработано, "
+                    f"{len(self._failed)} с ошибками"
                 )
 
                 return True
@@ -213,12 +457,135 @@ class ProgressManager:
             )
             return False
 
+    def _is_compatible(self, data: dict[str, Any]) -> bool:
+        """
+        Проверяет, что сохраненный прогресс относится к текущему запуску.
+
+        Аргументы:
+            data: Данные файла прогресса или заголовок журнала
+
+        Возвращает:
+            bool: True если версия, конфигурация и файл закладок совпадают
+        """
+        # Проверка версии
+        if data.get("version") != "1.0":
+            logger.warning(
+                f"Несовместимая версия прогресса: {data.get('version')}"
+            )
+            return False
+
+        # Проверка конфигурации
+        if data.get("config_hash") != self.config_hash:
+            logger.warning(
+                "Хеш конфигурации не совпадает, прогресс несовместим"
+            )
+            return False
+
+        # Проверка файла закладок
+        if data.get("bookmarks_file") != self.bookmarks_file:
+            logger.warning("Файл закладок не совпадает, прогресс несовместим")
+            return False
+
+        return True
+
+    def _load_state(self, data: dict[str, Any]) -> None:
+        """
+        Загружает текущую позицию и статистику из снимка или записи журнала.
+
+        Аргументы:
+            data: Словарь с полями current_position и statistics
+        """
+        pos_data = data.get("current_position")
+        if pos_data:
+            self.current_position = CurrentPosition(**pos_data)
+
+        stats_data = data.get("statistics")
+        if stats_data:
+            self.statistics = ProgressStatistics(**stats_data)
+
+    def _replay_journal(
+        self, snapshot_id: Optional[str]
+    ) -> tuple[Optional[int], bool]:
+        """
+        Применяет к загруженному состоянию записи журнала изменений.
+
+        Журнал учитывается, только если он относится к загруженному снимку.
+        Поврежденный хвост журнала (запись, прерванная сбоем) отбрасывается.
+
+        Аргументы:
+            snapshot_id: Идентификатор загруженного снимка
+
+        Возвращает:
+            tuple[Optional[int], bool]: Число примененных записей или None,
+            если журнал отсутствует или не относится к снимку, и признак того,
+            что журнал прочитан без поврежденных записей
+        """
+        try:
+            with open(self.journal_file, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None, True
+
+        try:
+            header = _loads_json(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or not self._is_compatible(header):
+            return None, True
+        if header.get("snapshot_id") != snapshot_id:
+            logger.warning(
+                f"Журнал прогресса не относится к файлу прогресса и пропущен: {self.journal_file}"
+            )
+            return None, True
+
+        applied = 0
+        intact = True
+        for line in lines[1:]:
+            try:
+                record = _loads_json(line)
+            except ValueError:
+                logger.warning(
+                    f"Поврежденная запись журнала прогресса, остаток журнала пропущен: {self.journal_file}"
+                )
+                intact = False
+                break
+
+            kind = record.pop("kind", None)
+            if kind == "processed":
+                processed = ProcessedBookmark(**record)
+                processed.folder_path = self._intern_folder_path(processed.folder_path)
+                self._append_processed(processed)
+            elif kind == "failed":
+                failed = FailedBookmark(**record)
+                failed.folder_path = self._intern_folder_path(failed.folder_path)
+                self._append_failed(failed)
+            elif kind == "remove_failed":
+                self._remove_failed(record["url"])
+            elif kind == "remove_processed_error":
+                self._remove_processed_error(record["url"])
+            elif kind == "state":
+                self._load_state(record)
+            applied += 1
+
+        logger.debug(f"Из журнала прогресса применено записей: {applied}")
+        return applied, intact
+
     def save_progress(self, force: bool = False) -> bool:
         """
         Сохраняет прогресс в файл.
 
+        Первое сохранение, принудительное сохранение и сохранение при
+        разросшемся журнале записывают полный снимок и очищают журнал.
+        Остальные периодические сохранения дописывают в журнал накопленные
+        записи.
+
+        Периодическое сохранение выполняется, если накоплено не меньше
+        save_interval изменений и с прошлого сохранения прошло flush_interval
+        секунд либо накоплено max_batch изменений. Изменения, не попавшие
+        в пакет, записываются следующим сохранением или force_save.
+
         Аргументы:
-            force: Принудительно сохранить независимо от интервала
+            force: Принудительно сохранить полный снимок независимо от интервала
 
         Возвращает:
             bool: True если прогресс успешно сохранен, иначе False
@@ -226,56 +593,46 @@ class ProgressManager:
         start_time = time.time()
         log_function_call("ProgressManager.save_progress", (), {"force": force})
 
-        # Проверяем интервал сохранения
-        total_processed = len(self.processed_bookmarks) + len(self.failed_bookmarks)
-        if not force and total_processed - self.last_save_count < self.save_interval:
-            return False
+        # Проверяем интервал сохранения: учитываются накопленные изменения,
+        # включая удаления, которые не увеличивают число записей
+        total_processed = len(self._processed) + len(self._failed)
+        pending = len(self._pending)
+        if not force:
+            if pending < self.save_interval:
+                return False
+            # Частые изменения объединяются в пакет в пределах окна сохранения
+            if (
+                pending < self.max_batch
+                and time.monotonic() - self._last_save_time < self.flush_interval
+            ):
+                return False
 
         try:
             with self._lock:
                 # Создаем директорию если нужно
                 self.output_dir.mkdir(parents=True, exist_ok=True)
 
-                # Подготовка данных для сохранения
-                data = {
-                    "version": "1.0",
-                    "timestamp": datetime.now().isoformat(),
-                    "bookmarks_file": self.bookmarks_file,
-                    "config_hash": self.config_hash,
-                    "processed_urls": [
-                        asdict(item) for item in self.processed_bookmarks
-                    ],
-                    "failed_urls": [asdict(item) for item in self.failed_bookmarks],
-                }
-
-                # Добавляем текущую позицию если есть
-                if self.current_position:
-                    data["current_position"] = asdict(self.current_position)  # type: ignore
-
-                # Добавляем статистику если есть
-                if self.statistics:
-                    data["statistics"] = asdict(self.statistics)  # type: ignore
-
-                # Атомарное сохранение через временный файл
-                temp_file = self.progress_file.with_suffix(".tmp")
-                with open(temp_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-
-                # Переименовываем временный файл
-                temp_file.replace(self.progress_file)
+                compact = self._journal_records >= max(
+                    PROGRESS_JOURNAL_COMPACT_MIN_RECORDS, total_processed
+                )
+                if force or self._needs_snapshot or compact:
+                    self._write_snapshot()
+                else:
+                    self._flush_journal()
 
                 self.last_save_count = total_processed
+                self._last_save_time = time.monotonic()
 
                 duration = time.time() - start_time
                 log_performance(
                     "ProgressManager.save_progress",
                     duration,
-                    f"processed={len(self.processed_bookmarks)}, failed={len(self.failed_bookmarks)}",
+                    f"processed={len(self._processed)}, failed={len(self._failed)}",
                 )
 
                 logger.debug(
-                    f"Прогресс сохранен: {len(self.processed_bookmarks)} обработано, "
-                    f"{len(self.failed_bookmarks)} с ошибками"
+                    f"Прогресс сохранен: {len(self._processed)} обработано, "
+                    f"{len(self._failed)} с ошибками"
                 )
 
                 return True
@@ -292,8 +649,224 @@ class ProgressManager:
             )
             return False
 
+    def _write_snapshot(self) -> None:
+        """
+        Атомарно записывает полное состояние в файл прогресса и удаляет журнал.
+
+        Снимок получает новый идентификатор, поэтому журнал, оставшийся
+        после сбоя между заменой файла и удалением журнала, не будет
+        применен к снимку повторно.
+        """
+        snapshot_id = uuid.uuid4().hex
+
+        # orjson сериализует dataclass-объекты напрямую, без промежуточных
+        # словарей; для pickle и стандартного json записи преобразуются в словари
+        processed_urls: list[Any]
+        failed_urls: list[Any]
+        if self.progress_format == "json" and orjson is not None:
+            processed_urls = list(self._processed.values())
+            failed_urls = list(self._failed.values())
+        else:
+            processed_urls = [_record_to_dict(item) for item in self._processed.values()]
+            failed_urls = [_record_to_dict(item) for item in self._failed.values()]
+
+        # Подготовка данных для сохранения
+        data: dict[str, Any] = {
+            "version": "1.0",
+            "timestamp": datetime.now().isoformat(),
+            "bookmarks_file": self.bookmarks_file,
+            "config_hash": self.config_hash,
+            "snapshot_id": snapshot_id,
+            "processed_urls": processed_urls,
+            "failed_urls": failed_urls,
+        }
+
+        # Добавляем текущую позицию если есть
+        if self.current_position:
+            data["current_position"] = _record_to_dict(self.current_position)
+
+        # Добавляем статистику если есть
+        if self.statistics:
+            data["statistics"] = _record_to_dict(self.statistics)
+
+        # Атомарное сохранение через временный файл
+        self._write_progress_data(data, self._temp_file)
+
+        # Атомарно заменяем файл прогресса временным файлом
+        os.replace(self._temp_file, self.progress_file)
+        self._fsync_directory()
+
+        self._snapshot_id = snapshot_id
+        self._pending.clear()
+        self._needs_snapshot = False
+        self._journal_valid = False
+        self._journal_records = 0
+        self.journal_file.unlink(missing_ok=True)
+
+    def _fsync_directory(self) -> None:
+        """
+        Сбрасывает на диск запись каталога файла прогресса.
+
+        Без этого переименование временного файла может не пережить сбой
+        питания. В Windows каталоги нельзя открыть для fsync, поэтому там
+        шаг пропускается.
+        """
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+
+        try:
+            fd = os.open(self.progress_file.parent, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            # Некоторые файловые системы не поддерживают fsync каталогов
+            pass
+        finally:
+            os.close(fd)
+
+    def _flush_journal(self) -> None:
+        """
+        Дописывает накопленные записи в журнал изменений одной операцией записи.
+
+        Пакет завершается записью с текущей позицией и статистикой, а новый
+        журнал начинается с заголовка с идентификатором снимка.
+        """
+        chunks = []
+        mode = "ab"
+        if not self._journal_valid:
+            mode = "wb"
+            chunks.append(
+                _dumps_json_line(
+                    {
+                        "version": "1.0",
+                        "bookmarks_file": self.bookmarks_file,
+                        "config_hash": self.config_hash,
+                        "snapshot_id": self._snapshot_id,
+                    }
+                )
+            )
+
+        for kind, item in self._pending:
+            if kind in _JOURNAL_REMOVAL_KINDS:
+                chunks.append(_dumps_json_line({"kind": kind, "url": item}))
+            else:
+                chunks.append(_dumps_json_line({"kind": kind, **_record_to_dict(item)}))
+        chunks.append(
+            _dumps_json_line(
+                {
+                    "kind": "state",
+                    "current_position": _record_to_dict(self.current_position)
+                    if self.current_position
+                    else None,
+                    "statistics": _record_to_dict(self.statistics)
+                    if self.statistics
+                    else None,
+                }
+            )
+        )
+
+        with open(self.journal_file, mode) as f:
+            f.write(b"".join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._journal_valid = True
+        # Учитываются записи пакета и завершающая запись состояния
+        self._journal_records += len(self._pending) + 1
+        self._pending.clear()
+
+    def _read_progress_data(self) -> dict[str, Any]:
+        """
+        Читает данные прогресса из файла в текущем формате.
+
+        Возвращает:
+            dict: Словарь с данными прогресса
+        """
+        if self.progress_format == "pickle":
+            with open(self.progress_file, "rb") as f:
+                return pickle.load(f)  # type: ignore[no-any-return]
+
+        with open(self.progress_file, "rb") as f:
+            return _loads_json(f.read())  # type: ignore[no-any-return]
+
+    def _serialize_progress_data(self, data: dict[str, Any]) -> bytes:
+        """
+        Сериализует данные прогресса в текущем формате.
+
+        Аргументы:
+            data: Словарь с данными прогресса
+
+        Возвращает:
+            bytes: Содержимое файла прогресса
+        """
+        if self.progress_format == "pickle":
+            return pickle.dumps(data, protocol=5)
+
+        if orjson is not None:
+            content: bytes = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            return content
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+    def _write_progress_data(self, data: dict[str, Any], file_path: Path) -> None:
+        """
+        Записывает данные прогресса в файл в текущем формате.
+
+        Содержимое сериализуется целиком, место под файл резервируется
+        заранее одним блоком, а данные сбрасываются на диск до возврата,
+        чтобы последующее переименование не оставило пустой файл после сбоя.
+
+        Аргументы:
+            data: Словарь с данными прогресса
+            file_path: Путь к файлу для записи
+        """
+        payload = self._serialize_progress_data(data)
+
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if payload and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, len(payload))
+                except OSError:
+                    # Файловая система может не поддерживать резервирование
+                    pass
+
+            view = memoryview(payload)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _intern_folder_path(
+        self, folder_path: Optional[Sequence[str]]
+    ) -> Optional[tuple[str, ...]]:
+        """
+        Возвращает общий кортеж для пути папки.
+
+        Все закладки одной папки ссылаются на один и тот же объект пути,
+        а имена папок интернируются при первом появлении пути.
+
+        Аргументы:
+            folder_path: Путь в иерархии папок
+
+        Возвращает:
+            Optional[tuple[str, ...]]: Разделяемый кортеж пути или None
+        """
+        if folder_path is None:
+            return None
+
+        key = tuple(folder_path)
+        path = self._folder_path_pool.get(key)
+        if path is None:
+            path = tuple(map(sys.intern, key))
+            self._folder_path_pool[path] = path
+        return path
+
     def add_processed_bookmark(
-        self, bookmark: Bookmark, file_path: str, folder_path: list[str]
+        self, bookmark: Bookmark, file_path: str, folder_path: Sequence[str]
     ) -> None:
         """
         Добавляет информацию об обработанной закладке.
@@ -309,22 +882,23 @@ class ProgressManager:
             {"url": bookmark.url, "file_path": file_path},
         )
 
-        processed = ProcessedBookmark(
-            url=bookmark.url,
-            title=bookmark.title,
-            processed_at=datetime.now().isoformat(),
-            file_path=file_path,
-            folder_path=folder_path,
-        )
-
         with self._lock:
-            self.processed_bookmarks.append(processed)
+            # Пул путей папок общий для всех потоков, поэтому используется под блокировкой
+            processed = ProcessedBookmark(
+                url=bookmark.url,
+                title=bookmark.title,
+                processed_at=datetime.now().isoformat(),
+                file_path=file_path,
+                folder_path=self._intern_folder_path(folder_path),
+            )
+            self._append_processed(processed)
+            self._pending.append(("processed", processed))
 
         # Периодическое сохранение
         self.save_progress()
 
     def add_failed_bookmark(
-        self, bookmark: Bookmark, error: str, folder_path: list[str]
+        self, bookmark: Bookmark, error: str, folder_path: Sequence[str]
     ) -> None:
         """
         Добавляет информацию о закладке с ошибкой.
@@ -340,16 +914,16 @@ class ProgressManager:
             {"url": bookmark.url, "error": error},
         )
 
-        failed = FailedBookmark(
-            url=bookmark.url,
-            title=bookmark.title,
-            failed_at=datetime.now().isoformat(),
-            error=error,
-            folder_path=folder_path,
-        )
-
         with self._lock:
-            self.failed_bookmarks.append(failed)
+            failed = FailedBookmark(
+                url=bookmark.url,
+                title=bookmark.title,
+                failed_at=datetime.now().isoformat(),
+                error=error,
+                folder_path=self._intern_folder_path(folder_path),
+            )
+            self._append_failed(failed)
+            self._pending.append(("failed", failed))
 
         # Периодическое сохранение
         self.save_progress()
@@ -391,8 +965,8 @@ class ProgressManager:
             now = datetime.now().isoformat()
             self.statistics = ProgressStatistics(
                 total_bookmarks=total_bookmarks,
-                processed_count=len(self.processed_bookmarks),
-                failed_count=len(self.failed_bookmarks),
+                processed_count=len(self._processed),
+                failed_count=len(self._failed),
                 skipped_count=0,
                 start_time=now,
                 last_update=now,
@@ -402,47 +976,56 @@ class ProgressManager:
         """Обновляет статистику прогресса."""
         with self._lock:
             if self.statistics:
-                self.statistics.processed_count = len(self.processed_bookmarks)
-                self.statistics.failed_count = len(self.failed_bookmarks)
+                self.statistics.processed_count = len(self._processed)
+                self.statistics.failed_count = len(self._failed)
                 self.statistics.last_update = datetime.now().isoformat()
 
-    def get_processed_urls(self, exclude_with_error: bool = True) -> set[str]:
+    def get_processed_urls(self, exclude_with_error: bool = True) -> AbstractSet[str]:
         """
         Возвращает множество обработанных URL.
 
+        Множества поддерживаются инкрементально, а объединение возвращается
+        как представление, поэтому вызов не требует прохода по закладкам.
+        Результат предназначен только для чтения.
+
         Аргументы:
             exclude_with_error: Исключать ли URL с полем error
 
         Возвращает:
-            set[str]: Множество обработанных URL
+            AbstractSet[str]: Множество обработанных URL
         """
         with self._lock:
             if exclude_with_error:
                 # Возвращаем только URL без ошибок
-                return {item.url for item in self.processed_bookmarks if not item.error}
+                return self._processed_url_set
             else:
                 # Возвращаем все URL
-                return {item.url for item in self.processed_bookmarks}
+                return self._processed.keys()
 
-    def get_failed_urls(self, include_error_from_processed: bool = False) -> set[str]:
+    def get_failed_urls(
+        self, include_error_from_processed: bool = False
+    ) -> AbstractSet[str]:
         """
         Возвращает множество URL с ошибками.
 
+        Множества поддерживаются инкрементально, а объединение возвращается
+        как представление, поэтому вызов не требует прохода по закладкам.
+        Результат предназначен только для чтения.
+
         Аргументы:
             include_error_from_processed: Включать ли URL из processed_urls с полем error
 
         Возвращает:
-            set[str]: Множество URL с ошибками
+            AbstractSet[str]: Множество URL с ошибками
         """
         with self._lock:
-            failed_urls = {item.url for item in self.failed_bookmarks}
-            
             # Если нужно включить URL из processed_urls с полем error
             if include_error_from_processed:
-                error_urls_from_processed = {item.url for item in self.processed_bookmarks if item.error}
-                failed_urls.update(error_urls_from_processed)
-            
-            return failed_urls
+                return _SetUnionView(
+                    self._failed.keys(), self._processed_error_url_set
+                )
+
+            return self._failed.keys()
 
     def get_resume_position(self) -> Optional[tuple[list[str], int]]:
         """
@@ -491,13 +1074,19 @@ class ProgressManager:
             with self._lock:
                 if self.progress_file.exists():
                     self.progress_file.unlink()
+                self.journal_file.unlink(missing_ok=True)
 
                 # Сбрасываем данные в памяти
-                self.processed_bookmarks.clear()
-                self.failed_bookmarks.clear()
+                self.processed_bookmarks = []
+                self.failed_bookmarks = []
                 self.current_position = None
                 self.statistics = None
                 self.last_save_count = 0
+                self._pending = []
+                self._snapshot_id = None
+                self._journal_valid = False
+                self._journal_records = 0
+                self._needs_snapshot = True
 
                 logger.info("Прогресс успешно очищен")
                 return True
@@ -525,12 +1114,11 @@ class ProgressManager:
         log_function_call("ProgressManager.remove_failed_bookmark", (url,))
 
         with self._lock:
-            original_count = len(self.failed_bookmarks)
-            self.failed_bookmarks = [item for item in self.failed_bookmarks if item.url != url]
-            removed = len(self.failed_bookmarks) != original_count
+            removed = self._remove_failed(url)
 
             if removed:
                 logger.debug(f"Закладка удалена из списка неудачных: {url}")
+                self._pending.append(("remove_failed", url))
                 # Сохраняем прогресс
                 self.save_progress()
             else:
@@ -538,7 +1126,7 @@ class ProgressManager:
 
             return removed
 
-    def move_failed_to_processed(self, bookmark: Bookmark, file_path: str, folder_path: list[str]) -> bool:
+    def move_failed_to_processed(self, bookmark: Bookmark, file_path: str, folder_path: Sequence[str]) -> bool:
         """
         Перемещает закладку из списка неудачных или из списка обработанных с ошибкой в список обработанных.
 
@@ -553,15 +1141,17 @@ class ProgressManager:
         log_function_call("ProgressManager.move_failed_to_processed", (bookmark.title,))
 
         with self._lock:
-            # Удаляем из списка неудачных
-            original_failed_count = len(self.failed_bookmarks)
-            self.failed_bookmarks = [item for item in self.failed_bookmarks if item.url != bookmark.url]
-            removed_from_failed = len(self.failed_bookmarks) != original_failed_count
+            shared_folder_path = self._intern_folder_path(folder_path)
+
+            # Удаляем из списка неудачных (список перестраивается только при наличии URL)
+            removed_from_failed = self._remove_failed(bookmark.url)
+            if removed_from_failed:
+                self._pending.append(("remove_failed", bookmark.url))
 
             # Также удаляем из списка обработанных с ошибкой (если есть)
-            original_processed_count = len(self.processed_bookmarks)
-            self.processed_bookmarks = [item for item in self.processed_bookmarks if not (item.url == bookmark.url and item.error)]
-            removed_from_processed_with_error = len(self.processed_bookmarks) != original_processed_count
+            removed_from_processed_with_error = self._remove_processed_error(bookmark.url)
+            if removed_from_processed_with_error:
+                self._pending.append(("remove_processed_error", bookmark.url))
 
             if removed_from_failed or removed_from_processed_with_error:
                 # Добавляем в список обработанных (без ошибки)
@@ -570,10 +1160,11 @@ class ProgressManager:
                     title=bookmark.title,
                     processed_at=datetime.now().isoformat(),
                     file_path=file_path,
-                    folder_path=folder_path,
+                    folder_path=shared_folder_path,
                     error=None  # Убедимся, что ошибка не сохраняется
                 )
-                self.processed_bookmarks.append(processed)
+                self._append_processed(processed)
+                self._pending.append(("processed", processed))
 
                 if removed_from_failed:
                     logger.info(f"Закладка перемещена из неудачных в обработанные: {bookmark.title}")
@@ -591,10 +1182,11 @@ class ProgressManager:
                     title=bookmark.title,
                     processed_at=datetime.now().isoformat(),
                     file_path=file_path,
-                    folder_path=folder_path,
+                    folder_path=shared_folder_path,
                     error=None  # Убедимся, что ошибка не сохраняется
                 )
-                self.processed_bookmarks.append(processed)
+                self._append_processed(processed)
+                self._pending.append(("processed", processed))
                 self.save_progress()
                 return False
 
@@ -610,15 +1202,9 @@ def calculate_config_hash(config: Any) -> str:
         str: Хеш конфигурации
     """
     # Создаем словарь с ключевыми параметрами конфигурации
-    config_data = {
-        "llm_model": config.llm_model,
-        "llm_max_tokens": config.llm_max_tokens,
-        "llm_temperature": config.llm_temperature,
-        "output_dir": config.output_dir,
-        "markdown_include_metadata": config.markdown_include_metadata,
-        "generate_mermaid_diagram": config.generate_mermaid_diagram,
-    }
-
-    # Сериализуем и хешируем
+    config_data = {field: getattr(config, field) for field in CONFIG_HASH_FIELDS}
+
+    # Сериализуем и хешируем. Алгоритм и формат сериализации не меняются:
+    # иначе сохраненный прогресс станет несовместимым с той же конфигурацией
     config_str = json.dumps(config_data, sort_keys=True)
-    return HashUtils.generate_text_hash(config_str, "sha256")
+    return hashlib.sha256(config_str.encode("utf-8")).hexdigest()
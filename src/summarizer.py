@@ -58,6 +58,7 @@ class ContentSummarizer:
         self.prompt_template = self._load_prompt_template()
         # Для rate limiting
         self.requests_times: list[float] = []
+        self._rate_limit_lock = asyncio.Lock()
         self.rate_limit_delay = (
             60 / config.llm_rate_limit if config.llm_rate_limit > 0 else 0
         )
@@ -146,42 +147,47 @@ class ContentSummarizer:
             logger.debug("Rate limiting отключен для LLM API")
             return
 
-        current_time = time.time()
-        # Удаляем времена запросов, которые были более 60 секунд назад
-        old_count = len(self.requests_times)
-        self.requests_times = [
-            req_time for req_time in self.requests_times if current_time - req_time < 60
-        ]
-        removed_count = old_count - len(self.requests_times)
+        # Лок сериализует выдачу слотов между параллельными задачами,
+        # иначе ожидающие проснутся одновременно и превысят лимит
+        async with self._rate_limit_lock:
+            current_time = time.time()
+            # Удаляем времена запросов, которые были более 60 секунд назад
+            old_count = len(self.requests_times)
+            self.requests_times = [
+                req_time
+                for req_time in self.requests_times
+                if current_time - req_time < 60
+            ]
+            removed_count = old_count - len(self.requests_times)
+
+            if removed_count > 0:
+                logger.debug(
+                    f"Удалено {removed_count} устаревших записей из LLM rate limit истории"
+                )
 
-        if removed_count > 0:
+            # Если количество запросов в минуту достигло лимита, ждем
+            if len(self.requests_times) >= self.config.llm_rate_limit:
+                sleep_time = 60 - (current_time - self.requests_times[0])
+                if sleep_time > 0:
+                    logger.debug(
+                        f"Ожидание {sleep_time:.2f} секунд из-за LLM rate limiting "
+                        f"(текущий запрос: {len(self.requests_times)}/{self.config.llm_rate_limit})"
+                    )
+                    await asyncio.sleep(sleep_time)
+                    # После ожидания снова проверяем список запросов
+                    current_time = time.time()
+                    self.requests_times = [
+                        req_time
+                        for req_time in self.requests_times
+                        if current_time - req_time < 60
+                    ]
+
+            # Добавляем текущий запрос
+            self.requests_times.append(current_time)
             logger.debug(
-                f"Удалено {removed_count} устаревших записей из LLM rate limit истории"
+                f"LLM запрос добавлен в rate limit историю: {len(self.requests_times)}/{self.config.llm_rate_limit}"
             )
 
-        # Если количество запросов в минуту достигло лимита, ждем
-        if len(self.requests_times) >= self.config.llm_rate_limit:
-            sleep_time = 60 - (current_time - self.requests_times[0])
-            if sleep_time > 0:
-                logger.debug(
-                    f"Ожидание {sleep_time:.2f} секунд из-за LLM rate limiting "
-                    f"(текущий запрос: {len(self.requests_times)}/{self.config.llm_rate_limit})"
-                )
-                await asyncio.sleep(sleep_time)
-                # После ожидания снова проверяем список запросов
-                current_time = time.time()
-                self.requests_times = [
-                    req_time
-                    for req_time in self.requests_times
-                    if current_time - req_time < 60
-                ]
-
-        # Добавляем текущий запрос
-        self.requests_times.append(current_time)
-        logger.debug(
-            f"LLM запрос добавлен в rate limit историю: {len(self.requests_times)}/{self.config.llm_rate_limit}"
-        )
-
     async def generate_summary(self, text: str, title: str) -> str:
         """
         Генерирует краткое описание страницы с помощью LLM.
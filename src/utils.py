@@ -5,6 +5,7 @@
 """
 
 import asyncio
+import functools
 import hashlib
 import logging
 import re
@@ -17,6 +18,29 @@ from urllib.parse import urlparse
 # Настройка логера для модуля
 logger = logging.getLogger(__name__)
 
+# Разница между 1 января 1601 года (эпоха Chrome) и 1 января 1970 года в микросекундах
+CHROME_EPOCH_OFFSET_US = 11644473600000000
+
+
+@functools.lru_cache(maxsize=4096)
+def chrome_timestamp_to_datetime(value: str) -> datetime:
+    """
+    Преобразует временную метку Chrome (микросекунды с 1601 года) в datetime.
+
+    Результаты кешируются: datetime неизменяем, а одинаковые метки
+    встречаются у закладок, импортированных или созданных одновременно.
+
+    Аргументы:
+        value: Временная метка Chrome в виде строки
+
+    Возвращает:
+        datetime: Дата в локальном часовом поясе
+
+    Raises:
+        ValueError, OverflowError, OSError: Если метка некорректна
+    """
+    return datetime.fromtimestamp((int(value) - CHROME_EPOCH_OFFSET_US) / 1000000.0)
+
 
 class PathUtils:
     """Утилиты для работы с путями файловой системы."""
@@ -179,14 +203,8 @@ class DateUtils:
             datetime: Объект datetime или None при ошибке
         """
         try:
-            # Chrome использует формат времени в микросекундах с 1 января 1601 года
-            # Преобразуем в формат Unix timestamp (с 1 января 1970 года)
-            # Chrome время - это количество микросекунд с 1601 года
-            # Разница между 1601 и 1970 годами в микросекундах: 11644473600000000
-            chrome_ts = int(chrome_timestamp)
-            unix_timestamp = (chrome_ts - 11644473600000000) / 1000000.0
-            return datetime.fromtimestamp(unix_timestamp)
-        except (ValueError, OSError) as e:
+            return chrome_timestamp_to_datetime(chrome_timestamp)
+        except (ValueError, OverflowError, OSError) as e:
             logger.error(f"Ошибка преобразования временной метки Chrome: {e}")
             return None
 
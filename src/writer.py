@@ -43,8 +43,11 @@ class FileSystemWriter:
         self.config = config
         self.output_dir = Path(config.output_dir)
 
+        # Директории, уже созданные этим писателем: повторный mkdir не нужен
+        self._created_dirs: set[Path] = set()
+
         # Создаем выходную директорию, если она не существует
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(self.output_dir)
         logger.info(f"Выходная директория создана/проверена: {self.output_dir}")
         logger.debug(
             f"Конфигурация FileSystemWriter: markdown_include_metadata={config.markdown_include_metadata}"
@@ -103,7 +106,7 @@ class FileSystemWriter:
         # Создаем текущую папку с нормализованным именем
         folder_name = self._sanitize_filename(folder.name, parent_path=parent_path, is_folder=True)
         folder_path = parent_path / folder_name
-        folder_path.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(folder_path)
         logger.debug(f"Создана папка: {folder_path}")
 
         # Рекурсивно обрабатываем вложенные папки
@@ -114,6 +117,19 @@ class FileSystemWriter:
             f"Папка {folder.name} содержит {len(folder.children)} подпапок и {len(folder.bookmarks)} закладок"
         )
 
+    def _ensure_dir(self, path: Path) -> None:
+        """
+        Создает директорию, если она еще не создавалась этим писателем.
+
+        Аргументы:
+            path: Путь к директории
+        """
+        if path in self._created_dirs:
+            return
+
+        path.mkdir(parents=True, exist_ok=True)
+        self._created_dirs.add(path)
+
     def write_markdown(self, page: ProcessedPage, file_path: Path) -> None:
         """
         Записывает обработанную страницу в Markdown-файл.
@@ -129,7 +145,7 @@ class FileSystemWriter:
 
         try:
             # Убеждаемся, что директория существует
-            file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(file_path.parent)
 
             # Формируем содержимое файла
             content = self._format_markdown_content(page)
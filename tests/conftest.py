@@ -2,17 +2,80 @@
 Общие фикстуры для интеграционных тестов.
 Содержит вспомогательные функции и фикстуры для создания тестовых данных.
 """
+import asyncio
 import json
 import tempfile
 import shutil
 from pathlib import Path
 from datetime import datetime
-from unittest.mock import Mock
+from types import SimpleNamespace
 
 import pytest
 
 from src.models import BookmarkFolder, Bookmark
 from src.config import ConfigManager
+from src.parser import BookmarkParser
+
+# Асинхронные тесты используют uvloop, если он установлен (не поддерживается в Windows)
+try:
+    import uvloop
+except ImportError:
+    pass
+else:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+# Файл закладок Chrome с папкой, вложенной закладкой и пустыми разделами
+_CHROME_BOOKMARKS_DATA = {
+    "checksum": "12345",
+    "roots": {
+        "bookmark_bar": {
+            "children": [
+                {
+                    "date_added": "13321112345678901",
+                    "id": "1",
+                    "name": "Test Bookmark",
+                    "type": "url",
+                    "url": "https://example.com"
+                },
+                {
+                    "children": [
+                        {
+                            "date_added": "13321112345678902",
+                            "id": "3",
+                            "name": "Nested Bookmark",
+                            "type": "url",
+                            "url": "https://nested-example.com"
+                        }
+                    ],
+                    "date_added": "13321112345678900",
+                    "id": "2",
+                    "name": "Test Folder",
+                    "type": "folder"
+                }
+            ],
+            "date_added": "13321112345678900",
+            "id": "0",
+            "name": "Bookmark Bar",
+            "type": "folder"
+        },
+        "other": {
+            "children": [],
+            "date_added": "13321112345678900",
+            "id": "4",
+            "name": "Other bookmarks",
+            "type": "folder"
+        },
+        "synced": {
+            "children": [],
+            "date_added": "13321112345678900",
+            "id": "5",
+            "name": "Mobile bookmarks",
+            "type": "folder"
+        }
+    },
+    "version": 1
+}
 
 
 @pytest.fixture
@@ -141,6 +204,23 @@ def nested_bookmarks_data():
     }
 
 
+@pytest.fixture(scope="session")
+def chrome_bookmarks_blob():
+    """Возвращает сериализованный JSON закладок Chrome (создается один раз за сессию)."""
+    return json.dumps(_CHROME_BOOKMARKS_DATA).encode("utf-8")
+
+
+@pytest.fixture(scope="session")
+def parsed_chrome_tree(chrome_bookmarks_blob):
+    """
+    Возвращает дерево, разобранное из chrome_bookmarks_blob.
+
+    Дерево общее для всех тестов сессии, поэтому тесты не должны его изменять.
+    """
+    parser = BookmarkParser()
+    return parser.parse_bookmarks(parser.load_json(chrome_bookmarks_blob))
+
+
 @pytest.fixture
 def simple_bookmarks_file(temp_dir, simple_bookmarks_data):
     """Создает тестовый файл с простыми закладками."""
@@ -164,11 +244,12 @@ def nested_bookmarks_file(temp_dir, nested_bookmarks_data):
 @pytest.fixture
 def mock_args():
     """Создает мок аргументов командной строки."""
-    args = Mock()
-    args.resume = False
-    args.dry_run = True  # Используем dry-run для тестов
-    args.no_diagram = True
-    return args
+    return SimpleNamespace(
+        resume=False,
+        check_error=False,
+        dry_run=True,  # Используем dry-run для тестов
+        no_diagram=True,
+    )
 
 
 @pytest.fixture
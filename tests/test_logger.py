@@ -8,22 +8,21 @@ import unittest
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 import logging
+import logging.handlers
+
+import pytest
 
 from src.logger import LoggerManager, get_logger, setup_logging, set_log_level
 from src.config import Config
 
 
-class TestLoggerManager(unittest.TestCase):
+class TestLoggerManager:
     """Тесты для класса LoggerManager."""
     
-    def setUp(self):
-        """Подготовка тестового окружения."""
-        # Создаем временный файл для логов
-        self.temp_dir = tempfile.mkdtemp()
-        self.log_file = os.path.join(self.temp_dir, "test.log")
-        
-        # Создаем тестовую конфигурацию
-        self.test_config = Config(
+    @pytest.fixture
+    def test_config(self, tmp_path):
+        """Создает тестовую конфигурацию с файлом лога во временной директории."""
+        return Config(
             llm_api_key="test_key",
             llm_base_url="https://api.test.com",
             llm_model="test-model",
@@ -45,87 +44,111 @@ class TestLoggerManager(unittest.TestCase):
             prompt_file="./test_prompt.txt",
             
             log_level="DEBUG",
-            log_file=self.log_file
+            log_file=str(tmp_path / "test.log")
         )
     
-    def tearDown(self):
-        """Очистка тестового окружения."""
-        # Удаляем временные файлы
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-    
     def test_singleton_pattern(self):
         """Тест паттерна Singleton."""
         manager1 = LoggerManager()
         manager2 = LoggerManager()
         
         # Должен быть один и тот же экземпляр
-        self.assertIs(manager1, manager2)
+        assert manager1 is manager2
     
-    def test_setup_logging(self):
+    def test_setup_logging(self, test_config):
         """Тест настройки логирования."""
         manager = LoggerManager()
-        manager.setup_logging(self.test_config)
+        manager.setup_logging(test_config)
         
         # Проверяем, что корневой логгер настроен
         root_logger = logging.getLogger()
-        self.assertEqual(root_logger.level, logging.DEBUG)
+        assert root_logger.level == logging.DEBUG
         
         # Проверяем наличие обработчиков
-        self.assertTrue(len(root_logger.handlers) >= 1)
+        assert len(root_logger.handlers) >= 1
     
-    def test_get_logger(self):
+    def test_get_logger(self, test_config):
         """Тест получения логгера."""
         manager = LoggerManager()
-        manager.setup_logging(self.test_config)
+        manager.setup_logging(test_config)
         
         logger1 = manager.get_logger("test_module")
         logger2 = manager.get_logger("test_module")
         logger3 = manager.get_logger("another_module")
         
         # Один и тот же модуль должен возвращать один и тот же логгер
-        self.assertIs(logger1, logger2)
+        assert logger1 is logger2
         
         # Разные модули должны возвращать разные логгеры
-        self.assertIsNot(logger1, logger3)
+        assert logger1 is not logger3
         
         # Проверяем имена логгеров
-        self.assertEqual(logger1.name, "test_module")
-        self.assertEqual(logger3.name, "another_module")
+        assert logger1.name == "test_module"
+        assert logger3.name == "another_module"
     
-    def test_set_level(self):
+    def test_set_level(self, test_config):
         """Тест изменения уровня логирования."""
         manager = LoggerManager()
-        manager.setup_logging(self.test_config)
+        manager.setup_logging(test_config)
         
         # Изменяем уровень
         manager.set_level("ERROR")
         
         # Проверяем уровень корневого логгера, а не дочернего
         root_logger = logging.getLogger()
-        self.assertEqual(root_logger.level, logging.ERROR)
+        assert root_logger.level == logging.ERROR
     
-    def test_file_handler_creation(self):
+    def test_file_handler_creation(self, test_config):
         """Тест создания файлового обработчика."""
         manager = LoggerManager()
-        manager.setup_logging(self.test_config)
+        manager.setup_logging(test_config)
         
         # Проверяем, что файл лога создан
-        self.assertTrue(os.path.exists(self.log_file))
+        assert os.path.exists(test_config.log_file)
     
-    def test_log_file_rotation(self):
-        """Тест ротации файлов лога."""
+    def test_file_logging_through_queue(self, test_config):
+        """Тест записи в файл через очередь и фоновый поток."""
         manager = LoggerManager()
-        manager.setup_logging(self.test_config)
+        manager.setup_logging(test_config)
+        
+        root_logger = logging.getLogger()
+        assert any(
+            isinstance(handler, logging.handlers.QueueHandler)
+            for handler in root_logger.handlers
+        )
+        
+        manager.get_logger("test_module").error("Сообщение через очередь")
+        # Остановка слушателя дописывает оставшиеся записи в файл
+        manager._stop_queue_listener()
         
-        logger = manager.get_logger("test_module")
+        with open(test_config.log_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        assert "test_module - ERROR - Сообщение через очередь" in content
+    
+    def test_log_file_rotation(self, test_config):
+        """Тест ротации файлов лога."""
+        manager = LoggerManager()
         
-        # Записываем много сообщений для проверки ротации
-        for i in range(1000):
-            logger.info(f"Test message {i}")
+        # Маленький лимит размера позволяет проверить ротацию на нескольких записях
+        handler = manager._create_file_handler(
+            test_config.log_file, max_bytes=256, backup_count=2
+        )
+        handler.setFormatter(manager._create_formatter())
+        record = logging.LogRecord(
+            "test_module", logging.INFO, __file__, 0, "Test message %d", (0,), None
+        )
+        try:
+            for i in range(20):
+                record.args = (i,)
+                handler.handle(record)
+        finally:
+            handler.close()
         
-        # Проверяем, что файл существует
-        self.assertTrue(os.path.exists(self.log_file))
+        # Проверяем, что файл существует и резервные копии созданы
+        assert os.path.exists(test_config.log_file)
+        assert os.path.exists(f"{test_config.log_file}.1")
+        assert os.path.exists(f"{test_config.log_file}.2")
+        assert not os.path.exists(f"{test_config.log_file}.3")
 
 
 class TestLoggerFunctions(unittest.TestCase):
@@ -133,9 +156,8 @@ class TestLoggerFunctions(unittest.TestCase):
     
     def setUp(self):
         """Подготовка тестового окружения."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.log_file = os.path.join(self.temp_dir, "test.log")
-        
+        # Файловый обработчик здесь не нужен: пустой log_file оставляет
+        # только консольный вывод, и тесты не обращаются к диску
         self.test_config = Config(
             llm_api_key="test_key",
             llm_base_url="https://api.test.com",
@@ -158,14 +180,9 @@ class TestLoggerFunctions(unittest.TestCase):
             prompt_file="./test_prompt.txt",
     
             log_level="INFO",
-            log_file=self.log_file
+            log_file=""
         )
     
-    def tearDown(self):
-        """Очистка тестового окружения."""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-    
     def test_get_logger_function(self):
         """Тест функции get_logger."""
         logger1 = get_logger("test_module")
@@ -207,6 +224,18 @@ class TestLoggerFunctions(unittest.TestCase):
         # Проверяем наличие сообщения о производительности
         self.assertIn("Производительность: test_operation выполнена за 2.50с (test details)", cm.output[0])
     
+    def test_log_performance_skipped_when_disabled(self):
+        """Тест отсутствия форматирования при отключенном уровне INFO."""
+        from src.logger import log_performance
+        
+        setup_logging(self.test_config)
+        set_log_level("WARNING")
+        
+        with patch.object(logging.Logger, "info") as mock_info:
+            log_performance("test_operation", 2.5, "test details")
+        
+        mock_info.assert_not_called()
+    
     def test_log_function_call(self):
         """Тест функции log_function_call."""
         from src.logger import log_function_call
@@ -275,39 +304,38 @@ class TestLoggerIntegration(unittest.TestCase):
     
     def test_logging_levels(self):
         """Тест различных уровней логирования."""
-        from src.logger import get_logger
+        # Конфигурация и обработчики создаются один раз, далее меняется только уровень
+        test_config = Config(
+            llm_api_key="test_key",
+            llm_base_url="https://api.test.com",
+            llm_model="test-model",
+            llm_max_tokens=1000,
+            llm_temperature=0.7,
+            llm_rate_limit=3,
+
+            fetch_timeout=30,
+            fetch_max_concurrent=10,
+            fetch_max_size_mb=5,
+            fetch_retry_attempts=3,
+            fetch_retry_delay=1.5,
+            fetch_max_redirects=5,
+
+            output_dir="./test_output",
+            markdown_include_metadata=True,
+            generate_mermaid_diagram=True,
+
+            prompt_file="./test_prompt.txt",
+
+            log_level="INFO",
+            log_file=self.log_file
+        )
+        setup_logging(test_config)
         
-        # Создаем тестовую конфигурацию для каждого уровня
         levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
         
         for level in levels:
             with self.subTest(level=level):
-                test_config = Config(
-                    llm_api_key="test_key",
-                    llm_base_url="https://api.test.com",
-                    llm_model="test-model",
-                    llm_max_tokens=1000,
-                    llm_temperature=0.7,
-                    llm_rate_limit=3,
-    
-                    fetch_timeout=30,
-                    fetch_max_concurrent=10,
-                    fetch_max_size_mb=5,
-                    fetch_retry_attempts=3,
-                    fetch_retry_delay=1.5,
-                    fetch_max_redirects=5,
-    
-                    output_dir="./test_output",
-                    markdown_include_metadata=True,
-                    generate_mermaid_diagram=True,
-    
-                    prompt_file="./test_prompt.txt",
-    
-                    log_level=level,
-                    log_file=self.log_file
-                )
-                
-                setup_logging(test_config)
+                set_log_level(level)
                 
                 # Проверяем уровень корневого логгера, а не дочернего
                 root_logger = logging.getLogger()
@@ -3,439 +3,603 @@
 Содержит unit-тесты для основного модуля приложения.
 """
 import asyncio
-import json
-import tempfile
-import unittest
+import sys
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch, mock_open
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, MagicMock, patch
 from datetime import datetime
 
+import pytest
+
 from src.main import (
     parse_arguments, setup_application_logging, create_progress_manager,
-    process_single_bookmark, traverse_and_process_folder,
+    process_single_bookmark, process_folder_bookmarks, traverse_and_process_folder,
     process_bookmarks, count_bookmarks, main
 )
 from src.models import Bookmark, BookmarkFolder, ProcessedPage
 from src.config import Config
+from src.diagram import DiagramGenerator
+from src.progress import ProgressManager
+from src.writer import FileSystemWriter
 
 
-class TestMainModule(unittest.TestCase):
-    """Тесты для основного модуля приложения."""
-    
-    def setUp(self):
-        """Подготовка тестового окружения."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.temp_path = Path(self.temp_dir)
-        
-        # Создаем тестовую конфигурацию
-        self.test_config = Config(
-            llm_api_key="test_key",
-            llm_base_url="https://api.test.com",
-            llm_model="test-model",
-            llm_max_tokens=1000,
-            llm_temperature=0.7,
-            llm_rate_limit=3,
-            fetch_timeout=30,
-            fetch_max_concurrent=10,
-            fetch_max_size_mb=5,
-            fetch_retry_attempts=3,
-            fetch_retry_delay=1.5,
-            fetch_max_redirects=5,
-            output_dir=str(self.temp_path / "output"),
-            markdown_include_metadata=True,
-            generate_mermaid_diagram=True,
-            prompt_file=str(self.temp_path / "prompt.txt"),
-            log_level="INFO",
-            log_file=str(self.temp_path / "test.log")
-        )
-        
-        # Создаем тестовые закладки
-        self.test_bookmark = Bookmark(
-            title="Test Bookmark",
-            url="https://example.com",
-            date_added=datetime.now()
-        )
-        
-        self.test_folder = BookmarkFolder(
-            name="Test Folder",
+# Кеш подсчета закладок: id папки -> (папка, количество)
+_COUNT_CACHE = {}
+
+
+def _cached_count(folder):
+    """
+    Подсчитывает закладки дерева один раз на каждый объект папки.
+
+    BookmarkFolder не хешируется, поэтому ключом служит id папки, а сама
+    папка хранится в кеше, чтобы id не мог быть переиспользован другим деревом.
+    """
+    entry = _COUNT_CACHE.get(id(folder))
+    if entry is None or entry[0] is not folder:
+        entry = (folder, count_bookmarks(folder))
+        _COUNT_CACHE[id(folder)] = entry
+    return entry[1]
+
+
+# Параметры тестовой конфигурации, не зависящие от путей
+_DEFAULT_CONFIG_KWARGS = dict(
+    llm_api_key="test_key",
+    llm_base_url="https://api.test.com",
+    llm_model="test-model",
+    llm_max_tokens=1000,
+    llm_temperature=0.7,
+    llm_rate_limit=3,
+    fetch_timeout=30,
+    fetch_max_concurrent=10,
+    fetch_max_size_mb=5,
+    fetch_retry_attempts=3,
+    fetch_retry_delay=1.5,
+    fetch_max_redirects=5,
+    markdown_include_metadata=True,
+    generate_mermaid_diagram=True,
+    log_level="INFO",
+)
+
+
+def _make_config(tmp_path, **overrides):
+    """Создает тестовую конфигурацию с путями внутри tmp_path."""
+    values = dict(
+        _DEFAULT_CONFIG_KWARGS,
+        output_dir=str(tmp_path / "output"),
+        prompt_file=str(tmp_path / "prompt.txt"),
+        log_file=str(tmp_path / "test.log"),
+    )
+    values.update(overrides)
+    return Config(**values)
+
+
+# Фиксированное время для детерминированных тестовых данных
+_FIXED_DATETIME = datetime(2025, 1, 1, 12, 0, 0)
+
+# Неизменяемые тестовые закладка и папка, создаются один раз при импорте
+_TEST_BOOKMARK = Bookmark(
+    title="Test Bookmark",
+    url="https://example.com",
+    date_added=_FIXED_DATETIME
+)
+_TEST_FOLDER = BookmarkFolder(
+    name="Test Folder",
+    children=[],
+    bookmarks=[_TEST_BOOKMARK]
+)
+
+# Дерево папок для подсчета закладок: 2 в корне + 2 в дочерней папке.
+# count_bookmarks не изменяет дерево, поэтому оно создается один раз
+_COUNT_TREE = BookmarkFolder(
+    name="Root Folder",
+    children=[
+        BookmarkFolder(
+            name="Child Folder",
             children=[],
-            bookmarks=[self.test_bookmark]
+            bookmarks=[
+                Bookmark("Child Bookmark 1", "https://child1.com", None),
+                Bookmark("Child Bookmark 2", "https://child2.com", None)
+            ]
         )
+    ],
+    bookmarks=[
+        Bookmark("Root Bookmark 1", "https://root1.com", None),
+        Bookmark("Root Bookmark 2", "https://root2.com", None)
+    ]
+)
+
+# Общие данные страниц для тестов обработки закладок
+_TEST_HTML = "<html><body>Test content</body></html>"
+_TEST_CONTENT = "Test content"
+_TEST_SUMMARY = "Test summary"
+
+# Варианты командной строки
+_ARGV_MINIMAL = ('main.py', 'bookmarks.json')
+_ARGV_FULL = (
+    'main.py', 'bookmarks.json',
+    '--config', 'custom.env',
+    '--output-dir', './custom_output',
+    '--resume',
+    '--dry-run',
+    '--verbose',
+    '--no-diagram',
+    '--max-concurrent', '5',
+)
+
+# Варианты командной строки и ожидаемые значения разобранных аргументов
+ARGV_CASES = (
+    # Только обязательный аргумент
+    (
+        _ARGV_MINIMAL,
+        dict(bookmarks_file='bookmarks.json', resume=False, dry_run=False,
+             verbose=False, no_diagram=False),
+    ),
+    # Все опции
+    (
+        _ARGV_FULL,
+        dict(bookmarks_file='bookmarks.json', config_path='custom.env',
+             output_dir='./custom_output', resume=True, dry_run=True,
+             verbose=True, no_diagram=True, max_concurrent=5),
+    ),
+)
+
+
+class _StubFetcher:
+    """Легковесная замена ContentFetcher, запоминающая вызовы."""
+    
+    def __init__(self, html=None, text=_TEST_CONTENT):
+        self._html = html
+        self._text = text
+        self.fetched_urls = []
+        self.extract_calls = 0
     
-    def tearDown(self):
-        """Очистка тестового окружения."""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    async def fetch_content(self, url):
+        self.fetched_urls.append(url)
+        return self._html
+    
+    def extract_text(self, html):
+        self.extract_calls += 1
+        return self._text
+
+
+class _StubSummarizer:
+    """Легковесная замена ContentSummarizer с подсчетом вызовов."""
+    
+    def __init__(self, summary=_TEST_SUMMARY):
+        self._summary = summary
+        self.calls = 0
+    
+    async def generate_summary(self, text, title):
+        self.calls += 1
+        return self._summary
+
+
+def _args(**overrides):
+    """Создает легковесный объект аргументов командной строки для тестов."""
+    values = dict(
+        bookmarks_file="test_bookmarks.json",
+        config_path=None,
+        output_dir=None,
+        resume=False,
+        dry_run=False,
+        verbose=False,
+        no_diagram=False,
+        check_error=False,
+        max_concurrent=None,
+        progress_file=None,
+        progress_format="json",
+        parse_cache=False,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture(scope="session")
+def main_tmp_path(tmp_path_factory):
+    """
+    Временная директория, общая для всех тестов модуля.
+
+    Тесты модуля не пишут в нее файлы (запись замокана), поэтому одна
+    директория заменяет создание и удаление отдельной директории на каждый тест.
+    """
+    return tmp_path_factory.mktemp("main", numbered=False)
+
+
+@pytest.fixture(scope="session")
+def test_config(main_tmp_path):
+    """
+    Тестовая конфигурация с путями внутри общей временной директории.
+
+    Тесты не изменяют конфигурацию, поэтому она создается один раз за сессию.
+    """
+    return _make_config(main_tmp_path)
+
+
+@pytest.fixture(scope="session")
+def test_bookmark():
+    """Тестовая закладка с фиксированной датой."""
+    return _TEST_BOOKMARK
+
+
+@pytest.fixture(scope="session")
+def test_folder():
+    """Тестовая папка с одной закладкой."""
+    return _TEST_FOLDER
+
+
+def _sanitize_filename_stub(name, parent_path=None, max_path_len=255, is_folder=False):
+    """Упрощенная замена FileSystemWriter._sanitize_filename для тестов."""
+    for char in '/:<>"|?*':
+        name = name.replace(char, "_")
+    return name[:50]
+
+
+@pytest.fixture(scope="module")
+def mock_templates():
+    """
+    Mock-компоненты со спецификацией, создаваемые один раз на модуль.
+
+    Построение MagicMock по спецификации класса заметно дороже сброса,
+    поэтому тесты получают эти объекты через фикстуру component_mocks.
+    """
+    writer = MagicMock(spec_set=FileSystemWriter)
+    writer._sanitize_filename = _sanitize_filename_stub
+    return SimpleNamespace(
+        writer=writer,
+        diagram=MagicMock(spec_set=DiagramGenerator),
+        progress_manager=MagicMock(spec_set=ProgressManager),
+    )
+
+
+@pytest.fixture
+def component_mocks(mock_templates):
+    """Возвращает общие mock-компоненты со сброшенными вызовами и значениями."""
+    for mock in vars(mock_templates).values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    return mock_templates
+
+
+class TestMainModule:
+    """Тесты для основного модуля приложения."""
     
-    def test_parse_arguments(self):
+    @pytest.mark.parametrize(("argv", "expected"), ARGV_CASES)
+    def test_parse_arguments(self, monkeypatch, argv, expected):
         """Тест парсинга аргументов командной строки."""
-        # Тест с обязательным аргументом
-        with patch('sys.argv', ['main.py', 'bookmarks.json']):
-            args = parse_arguments()
-            self.assertEqual(args.bookmarks_file, 'bookmarks.json')
-            self.assertFalse(args.resume)
-            self.assertFalse(args.dry_run)
-            self.assertFalse(args.verbose)
-            self.assertFalse(args.no_diagram)
-        
-        # Тест со всеми опциями
-        with patch('sys.argv', [
-            'main.py', 'bookmarks.json',
-            '--config', 'custom.env',
-            '--output-dir', './custom_output',
-            '--resume',
-            '--dry-run',
-            '--verbose',
-            '--no-diagram',
-            '--max-concurrent', '5'
-        ]):
-            args = parse_arguments()
-            self.assertEqual(args.bookmarks_file, 'bookmarks.json')
-            self.assertEqual(args.config_path, 'custom.env')
-            self.assertEqual(args.output_dir, './custom_output')
-            self.assertTrue(args.resume)
-            self.assertTrue(args.dry_run)
-            self.assertTrue(args.verbose)
-            self.assertTrue(args.no_diagram)
-            self.assertEqual(args.max_concurrent, 5)
+        # argparse может изменять sys.argv, поэтому передаем копию-список
+        monkeypatch.setattr(sys, "argv", list(argv))
+        args = parse_arguments()
+        for name, value in expected.items():
+            assert getattr(args, name) == value
     
     @patch('src.main.setup_logging')
-    def test_setup_application_logging(self, mock_setup_logging):
+    def test_setup_application_logging(self, mock_setup_logging, test_config):
         """Тест настройки логирования приложения."""
-        # Создаем mock объект для args
-        mock_args = MagicMock()
-        mock_args.verbose = False
+        mock_args = _args(verbose=False)
         
         # Вызываем функцию
-        setup_application_logging(mock_args, self.test_config)
+        setup_application_logging(mock_args, test_config)
         
         # Проверяем, что функция была вызвана с правильными параметрами
-        mock_setup_logging.assert_called_once_with(self.test_config)
+        mock_setup_logging.assert_called_once_with(test_config)
     
-    def test_create_progress_manager(self):
+    def test_create_progress_manager(self, test_config):
         """Тест создания менеджера прогресса."""
-        from src.progress import ProgressManager
-        
-        # Создаем mock объекты
-        mock_args = MagicMock()
-        mock_args.resume = False
-        
-        # Вызываем функцию
-        progress_manager = create_progress_manager(mock_args, self.test_config, "test_bookmarks.json")
-        
-        # Проверяем результат
-        self.assertIsNotNone(progress_manager)
-        self.assertEqual(progress_manager.output_dir, Path(self.test_config.output_dir))
-        self.assertEqual(progress_manager.bookmarks_file, "test_bookmarks.json")
-    
-    @unittest.skip("Требует асинхронного контекста")
-    async def test_process_single_bookmark(self):
-        """Тест обработки одной закладки."""
-        # Создаем mock объекты
-        mock_fetcher = AsyncMock()
-        mock_summarizer = AsyncMock()
-        
-        # Настраиваем mock для успешной загрузки
-        mock_fetcher.fetch_content.return_value = "<html><body>Test content</body></html>"
-        mock_fetcher.extract_text = MagicMock(return_value="Test content") # Изменено на MagicMock
-        mock_summarizer.generate_summary.return_value = "Test summary"
-        
-        processed_urls = set()
-        failed_urls = set()
-        
-        # Создаем mock менеджер прогресса
-        mock_progress_manager = MagicMock()
-        mock_progress_manager.get_processed_urls.return_value = processed_urls
-        mock_progress_manager.get_failed_urls.return_value = failed_urls
-        mock_progress_manager.add_processed_bookmark = MagicMock()
-        mock_progress_manager.add_failed_bookmark = MagicMock()
-        
-        # Создаем mock аргументов
-        mock_args = MagicMock()
-        mock_args.check_error = False
+        mock_args = _args(resume=False)
         
         # Вызываем функцию
-        result = await process_single_bookmark(
-            self.test_bookmark, mock_fetcher, mock_summarizer, mock_progress_manager, ["Test Folder"], mock_args
-        )
+        progress_manager = create_progress_manager(mock_args, test_config, "test_bookmarks.json")
         
         # Проверяем результат
-        self.assertIsNotNone(result)
-        self.assertIsInstance(result, ProcessedPage)
-        if result: # Добавлена проверка на None
-            self.assertEqual(result.url, self.test_bookmark.url)
-            self.assertEqual(result.title, self.test_bookmark.title)
-            self.assertEqual(result.summary, "Test summary")
-            self.assertEqual(result.status, 'success')
-        
-        # Проверяем вызовы mock объектов
-        mock_fetcher.fetch_content.assert_called_once_with(self.test_bookmark.url)
-        mock_fetcher.extract_text.assert_called_once()
-        mock_summarizer.generate_summary.assert_called_once()
-        mock_progress_manager.add_processed_bookmark.assert_called_once()
+        assert progress_manager is not None
+        assert progress_manager.output_dir == Path(test_config.output_dir)
+        assert progress_manager.bookmarks_file == "test_bookmarks.json"
     
     def test_count_bookmarks(self):
         """Тест подсчета закладок."""
-        # Создаем сложную структуру папок
-        child_folder = BookmarkFolder(
-            name="Child Folder",
-            children=[],
-            bookmarks=[
-                Bookmark("Child Bookmark 1", "https://child1.com", None),
-                Bookmark("Child Bookmark 2", "https://child2.com", None)
-            ]
-        )
-        
-        root_folder = BookmarkFolder(
-            name="Root Folder",
-            children=[child_folder],
-            bookmarks=[
-                Bookmark("Root Bookmark 1", "https://root1.com", None),
-                Bookmark("Root Bookmark 2", "https://root2.com", None)
-            ]
-        )
-        
-        # Вызываем функцию
-        count = count_bookmarks(root_folder)
+        count = _cached_count(_COUNT_TREE)
         
         # Проверяем результат
-        self.assertEqual(count, 4)  # 2 в корне + 2 в дочерней папке
+        assert count == 4  # 2 в корне + 2 в дочерней папке
     
-    @patch('src.main.ContentFetcher')
-    @patch('src.main.ContentSummarizer')
-    @patch('src.main.FileSystemWriter')
-    @patch('src.main.DiagramGenerator')
-    @patch('src.main.create_progress_manager')
-    def test_process_bookmarks(self, mock_create_progress_manager, mock_diagram_gen, mock_writer_class,
-                              mock_summarizer_class, mock_fetcher_class):
-        """Тест основной функции обработки закладок."""
-        # Создаем mock объекты
-        mock_args = MagicMock()
-        mock_args.resume = False
-        mock_args.dry_run = False
-        mock_args.no_diagram = False
-        mock_args.check_error = False  # Добавляем это для правильной работы функции
-        
-        mock_fetcher = AsyncMock()
-        mock_fetcher_class.return_value.__aenter__.return_value = mock_fetcher
-        mock_fetcher.fetch_content.return_value = "<html>Test</html>"
-        mock_fetcher.extract_text.return_value = "Test content"
-        
-        mock_summarizer = AsyncMock()
-        mock_summarizer_class.return_value = mock_summarizer
-        mock_summarizer.generate_summary.return_value = "Test summary"
-        
-        mock_writer = MagicMock()
-        mock_writer_class.return_value = mock_writer
-        # Обновляем mock для _sanitize_filename, чтобы он принимал parent_path и is_folder
-        def mock_sanitize_filename(name, parent_path=None, max_path_len=255, is_folder=False):
-            return name.replace("/", "_").replace(":", "_").replace("<", "_").replace(">", "_").replace('"', "_").replace("|", "_").replace("?", "_").replace("*", "_")[:50]
-        mock_writer._sanitize_filename = mock_sanitize_filename
-        
-        mock_diagram = MagicMock()
-        mock_diagram_gen.return_value = mock_diagram
-        mock_diagram.generate_structure_diagram.return_value = "diagram_code"
-        
-        mock_progress_manager = MagicMock()
-        mock_create_progress_manager.return_value = mock_progress_manager
-        mock_progress_manager.load_progress.return_value = False
-        mock_progress_manager.get_processed_urls.return_value = set()  # Добавляем это
-        mock_progress_manager.get_failed_urls.return_value = set()     # Добавляем это
-        mock_progress_manager.initialize_statistics = MagicMock()
-        mock_progress_manager.get_resume_position.return_value = None
-        mock_progress_manager.update_statistics = MagicMock()
-        mock_progress_manager.force_save = MagicMock()
-        mock_progress_manager.add_processed_bookmark = MagicMock() # Добавляем это
-        mock_progress_manager.add_failed_bookmark = MagicMock()     # Добавляем это
-        
-        # Вызываем функцию через asyncio.run
-        processed, failed = asyncio.run(process_bookmarks(mock_args, self.test_config, self.test_folder, "test_bookmarks.json"))
-        
-        # Проверяем результат
-        self.assertEqual(processed, 1)
-        self.assertEqual(failed, 0)
-        
-        # Проверяем вызовы mock объектов
-        mock_writer.create_folder_structure.assert_called_once()
-        mock_diagram.generate_structure_diagram.assert_called_once()
-        mock_diagram.save_diagram.assert_called_once()
-        mock_progress_manager.initialize_statistics.assert_called_once()
-        mock_progress_manager.force_save.assert_called_once()
+    def test_count_bookmarks_deep(self):
+        """Тест подсчета закладок в дереве глубже лимита рекурсии."""
+        depth = 10000
+        root = BookmarkFolder(name="Level 0", children=[], bookmarks=[_TEST_BOOKMARK])
+        current = root
+        for level in range(1, depth):
+            child = BookmarkFolder(
+                name=f"Level {level}", children=[], bookmarks=[_TEST_BOOKMARK]
+            )
+            current.children.append(child)
+            current = child
+        
+        assert count_bookmarks(root) == depth
     
-    @patch('src.main.parse_arguments')
-    @patch('src.main.ConfigManager')
-    @patch('src.main.setup_application_logging')
-    @patch('src.main.BookmarkParser')
-    @patch('src.main.asyncio.run')
-    @patch('pathlib.Path.exists')
-    def test_main_function(self, mock_exists, mock_asyncio_run,
-                          mock_parser_class, mock_setup_logging,
-                          mock_config_manager, mock_parse_arguments):
+    def test_main_function(self, main_tmp_path, test_folder):
         """Тест главной функции."""
-        # Настраиваем mock объекты
-        mock_args = MagicMock()
-        mock_args.bookmarks_file = "test_bookmarks.json"
-        mock_args.config_path = None
-        mock_args.output_dir = None
-        mock_args.max_concurrent = None
-        mock_args.verbose = False
-        mock_parse_arguments.return_value = mock_args
-        
-        mock_exists.return_value = True
-        
-        mock_config = MagicMock()
-        mock_config.output_dir = str(self.temp_path / "output")
-        mock_config.log_level = "INFO"
-        mock_config_manager.return_value.get.return_value = mock_config
-        
-        mock_parser = MagicMock()
-        mock_data = {"roots": {}}
-        mock_parser.load_json.return_value = mock_data
-        mock_parser.parse_bookmarks.return_value = self.test_folder
-        mock_parser_class.return_value = mock_parser
-        
-        mock_asyncio_run.return_value = (1, 0)
-        
-        # Вызываем функцию
-        main()
+        def run_stub(coro):
+            # Корутина закрывается без запуска цикла событий
+            coro.close()
+            return (1, 0)
+        
+        with patch.multiple(
+            'src.main',
+            parse_arguments=DEFAULT,
+            ConfigManager=DEFAULT,
+            setup_application_logging=DEFAULT,
+            BookmarkParser=DEFAULT,
+        ) as mocks, patch.object(
+            asyncio, 'run', side_effect=run_stub
+        ) as mock_asyncio_run, patch.object(Path, 'exists', return_value=True):
+            # Настраиваем mock объекты
+            mocks['parse_arguments'].return_value = _args(bookmarks_file="test_bookmarks.json")
+            
+            mock_config = MagicMock()
+            mock_config.output_dir = str(main_tmp_path / "output")
+            mock_config.log_level = "INFO"
+            mocks['ConfigManager'].return_value.get.return_value = mock_config
+            
+            mock_parser = mocks['BookmarkParser'].return_value
+            mock_parser.load_bookmarks.return_value = test_folder
+            
+            # Вызываем функцию
+            main()
         
         # Проверяем вызовы
-        mock_parse_arguments.assert_called_once()
-        mock_config_manager.assert_called_once_with(None)
-        mock_setup_logging.assert_called_once()
-        mock_parser.load_json.assert_called_once_with("test_bookmarks.json")
-        mock_parser.parse_bookmarks.assert_called_once_with(mock_data)
+        mocks['parse_arguments'].assert_called_once()
+        mocks['ConfigManager'].assert_called_once_with(None)
+        mocks['setup_application_logging'].assert_called_once()
+        mock_parser.load_bookmarks.assert_called_once_with(
+            "test_bookmarks.json", cache_file=None
+        )
         mock_asyncio_run.assert_called_once()
 
 
-class TestMainModuleAsync(unittest.IsolatedAsyncioTestCase):
-    """Асинхронные тесты для основного модуля."""
+@pytest.mark.asyncio(loop_scope="class")
+class TestMainModuleAsync:
+    """Асинхронные тесты для основного модуля (один цикл событий на класс)."""
     
-    def setUp(self):
-        """Подготовка тестового окружения."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.temp_path = Path(self.temp_dir)
+    def _make_mocks(self, component_mocks, *, fetch_content=None, extract_text=_TEST_CONTENT,
+                    summary=_TEST_SUMMARY, processed_urls=None, failed_urls=None):
+        """Создает заглушки загрузчика, генератора описаний и mock менеджера прогресса."""
+        mock_fetcher = _StubFetcher(html=fetch_content, text=extract_text)
+        mock_summarizer = _StubSummarizer(summary=summary)
         
-        self.test_bookmark = Bookmark(
-            title="Test Bookmark",
-            url="https://example.com",
-            date_added=datetime.now()
-        )
-    
-    def tearDown(self):
-        """Очистка тестового окружения."""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        mock_progress_manager = component_mocks.progress_manager
+        mock_progress_manager.get_processed_urls.return_value = processed_urls or set()
+        mock_progress_manager.get_failed_urls.return_value = failed_urls or set()
+        
+        return mock_fetcher, mock_summarizer, mock_progress_manager
     
-    async def test_process_single_bookmark_success(self):
+    async def test_process_single_bookmark_success(self, test_bookmark, component_mocks):
         """Тест успешной обработки одной закладки."""
-        # Создаем mock объекты
-        mock_fetcher = AsyncMock()
-        mock_summarizer = AsyncMock()
-        
-        # Настраиваем mock для успешной загрузки
-        mock_fetcher.fetch_content.return_value = "<html><body>Test content</body></html>"
-        mock_fetcher.extract_text = MagicMock(return_value="Test content") # Изменено на MagicMock
-        mock_summarizer.generate_summary.return_value = "Test summary"
-        
-        processed_urls = set()
-        failed_urls = set()
-        
-        # Создаем mock менеджер прогресса
-        mock_progress_manager = MagicMock()
-        mock_progress_manager.get_processed_urls.return_value = processed_urls
-        mock_progress_manager.get_failed_urls.return_value = failed_urls
-        mock_progress_manager.add_processed_bookmark = MagicMock() # Возвращено на MagicMock
-        mock_progress_manager.add_failed_bookmark = MagicMock()     # Возвращено на MagicMock
-        
-        # Создаем mock аргументов
-        mock_args = MagicMock()
-        mock_args.check_error = False
+        mock_fetcher, mock_summarizer, mock_progress_manager = self._make_mocks(
+            component_mocks, fetch_content=_TEST_HTML
+        )
         
         # Вызываем функцию
         result = await process_single_bookmark(
-            self.test_bookmark, mock_fetcher, mock_summarizer, mock_progress_manager, ["Test Folder"], mock_args
+            test_bookmark, mock_fetcher, mock_summarizer, mock_progress_manager, ["Test Folder"], _args()
         )
         
         # Проверяем результат
-        self.assertIsNotNone(result)
-        self.assertIsInstance(result, ProcessedPage)
+        assert result is not None
+        assert isinstance(result, ProcessedPage)
         if result: # Добавлена проверка на None
-            self.assertEqual(result.url, self.test_bookmark.url)
-            self.assertEqual(result.title, self.test_bookmark.title)
-            self.assertEqual(result.summary, "Test summary")
-            self.assertEqual(result.status, 'success')
+            assert result.url == test_bookmark.url
+            assert result.title == test_bookmark.title
+            assert result.summary == _TEST_SUMMARY
+            assert result.status == 'success'
         
         # Проверяем вызовы mock объектов
-        mock_fetcher.fetch_content.assert_called_once_with(self.test_bookmark.url)
-        mock_fetcher.extract_text.assert_called_once()
-        mock_summarizer.generate_summary.assert_called_once()
+        assert mock_fetcher.fetched_urls == [test_bookmark.url]
+        assert mock_fetcher.extract_calls == 1
+        assert mock_summarizer.calls == 1
         # В process_single_bookmark не вызывается add_processed_bookmark
         # Это происходит в traverse_and_process_folder
         mock_progress_manager.add_processed_bookmark.assert_not_called()
     
-    async def test_process_single_bookmark_failure(self):
+    async def test_process_single_bookmark_failure(self, test_bookmark, component_mocks):
         """Тест обработки закладки с ошибкой."""
-        # Создаем mock объекты
-        mock_fetcher = AsyncMock()
-        mock_summarizer = AsyncMock()
-        
-        # Настраиваем mock для ошибки загрузки
-        mock_fetcher.fetch_content.return_value = None
-        
-        processed_urls = set()
-        failed_urls = set()
-        
-        # Создаем mock менеджер прогресса
-        mock_progress_manager = MagicMock()
-        mock_progress_manager.get_processed_urls.return_value = processed_urls
-        mock_progress_manager.get_failed_urls.return_value = failed_urls
-        mock_progress_manager.add_processed_bookmark = MagicMock() # Возвращено на MagicMock
-        mock_progress_manager.add_failed_bookmark = MagicMock()     # Возвращено на MagicMock
-        
-        # Создаем mock аргументов
-        mock_args = MagicMock()
-        mock_args.check_error = False
+        # Загрузка контента завершается ошибкой
+        mock_fetcher, mock_summarizer, mock_progress_manager = self._make_mocks(
+            component_mocks, fetch_content=None
+        )
         
         # Вызываем функцию
         result = await process_single_bookmark(
-            self.test_bookmark, mock_fetcher, mock_summarizer, mock_progress_manager, ["Test Folder"], mock_args
+            test_bookmark, mock_fetcher, mock_summarizer, mock_progress_manager, ["Test Folder"], _args()
         )
         
         # Проверяем результат
-        self.assertIsNone(result)
+        assert result is None
         mock_progress_manager.add_failed_bookmark.assert_called_once()
     
-    async def test_process_single_bookmark_skip_processed(self):
+    async def test_process_single_bookmark_skip_processed(self, test_bookmark, component_mocks):
         """Тест пропуска уже обработанной закладки."""
-        # Создаем mock объекты
-        mock_fetcher = AsyncMock()
-        mock_summarizer = AsyncMock()
-        
-        processed_urls = {self.test_bookmark.url}
-        failed_urls = set()
-        
-        # Создаем mock менеджер прогресса
-        mock_progress_manager = MagicMock()
-        mock_progress_manager.get_processed_urls.return_value = processed_urls
-        mock_progress_manager.get_failed_urls.return_value = failed_urls
-        mock_progress_manager.add_processed_bookmark = MagicMock() # Возвращено на MagicMock
-        mock_progress_manager.add_failed_bookmark = MagicMock()     # Возвращено на MagicMock
-        
-        # Создаем mock аргументов
-        mock_args = MagicMock()
-        mock_args.check_error = False
+        mock_fetcher, mock_summarizer, mock_progress_manager = self._make_mocks(
+            component_mocks, processed_urls={test_bookmark.url}
+        )
         
         # Вызываем функцию
         result = await process_single_bookmark(
-            self.test_bookmark, mock_fetcher, mock_summarizer, mock_progress_manager, ["Test Folder"], mock_args
+            test_bookmark, mock_fetcher, mock_summarizer, mock_progress_manager, ["Test Folder"], _args()
         )
         
         # Проверяем результат
-        self.assertIsNone(result)
+        assert result is None
         # Проверяем, что fetch_content не вызывался
-        mock_fetcher.fetch_content.assert_not_called()
+        assert mock_fetcher.fetched_urls == []
+
+    async def test_process_folder_bookmarks_concurrency(self, main_tmp_path, component_mocks):
+        """Тест конкурентной обработки закладок папки с ограничением параллелизма."""
+        bookmarks = [
+            (i, Bookmark(title=f"Bookmark {i}", url=f"https://example.com/{i}", date_added=None))
+            for i in range(6)
+        ]
+        active = 0
+        max_active = 0
+
+        async def fake_process_single_bookmark(bookmark, *args):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            # Закладки с нечетным номером завершаются ошибкой
+            if bookmark.url.endswith(("1", "3", "5")):
+                return None
+            return ProcessedPage(
+                url=bookmark.url, title=bookmark.title, summary=_TEST_SUMMARY,
+                fetch_date=_FIXED_DATETIME, status="success"
+            )
+
+        mock_writer = component_mocks.writer
+        mock_progress_manager = component_mocks.progress_manager
+
+        with patch("src.main.process_single_bookmark", side_effect=fake_process_single_bookmark):
+            processed, failed = await process_folder_bookmarks(
+                bookmarks, main_tmp_path, ["Test Folder"], len(bookmarks),
+                _StubFetcher(), _StubSummarizer(), mock_writer, mock_progress_manager, MagicMock(),
+                check_error=False, args=_args(), max_concurrent=2
+            )
+
+        assert (processed, failed) == (3, 3)
+        assert max_active == 2
+        assert mock_writer.write_markdown.call_count == 3
+        assert mock_progress_manager.add_processed_bookmark.call_count == 3
+        # Позиция никогда не опережает самую раннюю незавершенную закладку
+        positions = [c.args[1] for c in mock_progress_manager.update_current_position.call_args_list]
+        assert positions == sorted(positions)
+    
+    def _setup_process_mocks(self, mocks, mock_fetcher, component_mocks):
+        """
+        Настраивает mock-компоненты для process_bookmarks.
+
+        Возвращает:
+            tuple: (mock_writer, mock_diagram, mock_progress_manager)
+        """
+        mocks['ContentFetcher'].return_value.__aenter__.return_value = mock_fetcher
+        
+        mocks['ContentSummarizer'].return_value = _StubSummarizer()
+        
+        mock_writer = component_mocks.writer
+        mocks['FileSystemWriter'].return_value = mock_writer
+        
+        mock_diagram = component_mocks.diagram
+        mocks['DiagramGenerator'].return_value = mock_diagram
+        mock_diagram.generate_structure_diagram.return_value = "diagram_code"
+        
+        mock_progress_manager = component_mocks.progress_manager
+        mocks['create_progress_manager'].return_value = mock_progress_manager
+        mock_progress_manager.load_progress.return_value = False
+        mock_progress_manager.get_processed_urls.return_value = set()
+        mock_progress_manager.get_failed_urls.return_value = set()
+        mock_progress_manager.get_resume_position.return_value = None
+        
+        return mock_writer, mock_diagram, mock_progress_manager
+    
+    @patch.multiple(
+        'src.main',
+        ContentFetcher=DEFAULT,
+        ContentSummarizer=DEFAULT,
+        FileSystemWriter=DEFAULT,
+        DiagramGenerator=DEFAULT,
+        create_progress_manager=DEFAULT,
+    )
+    async def test_process_bookmarks(self, test_config, test_folder, component_mocks, **mocks):
+        """Тест основной функции обработки закладок."""
+        mock_args = _args(resume=False, dry_run=False, no_diagram=False, check_error=False)
+        
+        mock_fetcher = _StubFetcher(html=_TEST_HTML)
+        mock_writer, mock_diagram, mock_progress_manager = self._setup_process_mocks(
+            mocks, mock_fetcher, component_mocks
+        )
+        
+        processed, failed = await process_bookmarks(
+            mock_args, test_config, test_folder, "test_bookmarks.json"
+        )
+        
+        # Проверяем результат
+        assert processed == 1
+        assert failed == 0
+        
+        # Проверяем вызовы mock объектов
+        mock_writer.create_folder_structure.assert_called_once()
+        mock_diagram.generate_structure_diagram.assert_called_once()
+        mock_diagram.save_diagram.assert_called_once()
+        mock_progress_manager.initialize_statistics.assert_called_once()
+        mock_progress_manager.force_save.assert_called_once()
+    
+    @patch.multiple(
+        'src.main',
+        ContentFetcher=DEFAULT,
+        ContentSummarizer=DEFAULT,
+        FileSystemWriter=DEFAULT,
+        DiagramGenerator=DEFAULT,
+        create_progress_manager=DEFAULT,
+    )
+    async def test_process_bookmarks_concurrent(self, test_config, component_mocks, **mocks):
+        """Тест конкурентной загрузки закладок одной папки."""
+        bookmarks = [Bookmark(f"b{i}", f"https://e{i}.com", None) for i in range(5)]
+        folder = BookmarkFolder(name="Test Folder", children=[], bookmarks=bookmarks)
+        active = 0
+        max_active = 0
+        
+        async def fetch_content(url):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0)
+            active -= 1
+            return _TEST_HTML
+        
+        mock_fetcher = _StubFetcher()
+        mock_fetcher.fetch_content = fetch_content
+        mock_writer, _, mock_progress_manager = self._setup_process_mocks(
+            mocks, mock_fetcher, component_mocks
+        )
+        
+        processed, failed = await process_bookmarks(
+            _args(no_diagram=True), test_config, folder, "test_bookmarks.json"
+        )
+        
+        assert (processed, failed) == (5, 0)
+        # Все закладки папки загружаются одновременно (лимит fetch_max_concurrent=10)
+        assert max_active == len(bookmarks)
+        assert mock_writer.write_markdown.call_count == len(bookmarks)
+        assert mock_progress_manager.add_processed_bookmark.call_count == len(bookmarks)
+
+    @patch.multiple(
+        'src.main',
+        ContentFetcher=DEFAULT,
+        ContentSummarizer=DEFAULT,
+        FileSystemWriter=DEFAULT,
+        DiagramGenerator=DEFAULT,
+        create_progress_manager=DEFAULT,
+    )
+    async def test_process_bookmarks_duplicate_url_in_folder(self, test_config, component_mocks, **mocks):
+        """Тест однократной обработки URL, повторяющегося в одной папке."""
+        bookmarks = [
+            Bookmark("first", "https://dup.example.com", None),
+            Bookmark("second", "https://dup.example.com", None),
+        ]
+        folder = BookmarkFolder(name="Test Folder", children=[], bookmarks=bookmarks)
+
+        mock_fetcher = _StubFetcher(html=_TEST_HTML)
+        mock_writer, _, mock_progress_manager = self._setup_process_mocks(
+            mocks, mock_fetcher, component_mocks
+        )
+
+        processed, failed = await process_bookmarks(
+            _args(no_diagram=True), test_config, folder, "test_bookmarks.json"
+        )
+
+        assert (processed, failed) == (1, 0)
+        assert mock_fetcher.fetched_urls == ["https://dup.example.com"]
+        assert mock_writer.write_markdown.call_count == 1
+        assert mock_progress_manager.add_processed_bookmark.call_count == 1
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    pytest.main([__file__])
\ No newline at end of file
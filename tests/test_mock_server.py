@@ -2,15 +2,95 @@
 Mock-сервер для имитации LLM API в тестах.
 Создает локальный HTTP-сервер, совместимый с OpenAI API.
 """
-import json
 import asyncio
-from typing import Dict, Any, Optional
+import os
+from collections import deque
+from typing import Dict, Any, List, Optional, TypedDict, Union
 from unittest.mock import AsyncMock, patch
 
+import orjson
 import pytest
 import httpx
 
 
+# Markdown-описание, которое mock-сервер возвращает по умолчанию
+_SAMPLE_SUMMARY = """## Основная тема
+
+Это тестовая страница, содержащая основную информацию о теме.
+
+## Ключевые моменты
+
+- Первый важный момент
+- Второй важный момент
+- Третий важный момент
+
+## Вывод
+
+На основе представленной информации можно сделать вывод о значимости данной темы."""
+
+
+class ChatMessage(TypedDict):
+    """Сообщение в ответе chat/completions."""
+
+    role: str
+    content: str
+
+
+class ChatChoice(TypedDict):
+    """Вариант ответа chat/completions."""
+
+    index: int
+    message: ChatMessage
+    finish_reason: str
+
+
+class ChatUsage(TypedDict):
+    """Статистика использования токенов."""
+
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+class ChatCompletionResponse(TypedDict):
+    """Успешный ответ chat/completions в формате OpenAI API."""
+
+    id: str
+    object: str
+    created: int
+    model: str
+    choices: List[ChatChoice]
+    usage: ChatUsage
+
+
+# Ответ LLM по умолчанию и его сериализованная форма, создаются один раз при импорте
+_DEFAULT_RESPONSE: ChatCompletionResponse = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 1677652288,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": _SAMPLE_SUMMARY
+            },
+            "finish_reason": "stop"
+        }
+    ],
+    "usage": {
+        "prompt_tokens": 56,
+        "completion_tokens": 31,
+        "total_tokens": 87
+    }
+}
+_DEFAULT_RESPONSE_BYTES = orjson.dumps(_DEFAULT_RESPONSE)
+
+# Заголовки JSON-ответов mock-сервера
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
 class MockLLMServer:
     """
     Mock-сервер для имитации LLM API.
@@ -19,93 +99,89 @@ class MockLLMServer:
     
     def __init__(self):
         """Инициализация mock-сервера."""
-        self.responses = []
+        # Очередь ответов: извлечение из начала за O(1)
+        self.responses = deque()
         self.call_count = 0
         self.last_request = None
+        # HTTP-ответ по умолчанию создается при первом запросе и переиспользуется
+        self._default_httpx_response = None
+        # Обработчики запросов по паре (HTTP-метод, путь API)
+        self._routes = {
+            ("POST", "/v1/chat/completions"): self._handle_chat,
+            ("GET", "/v1/models"): self._handle_models,
+        }
         
     async def handle_request(self, method: str, url: str, **kwargs):
         """Обработчик HTTP-запросов."""
         self.call_count += 1
         
-        if url.endswith("/v1/chat/completions") and method == "POST":
-            # Получаем тело запроса
-            if "json" in kwargs:
-                self.last_request = kwargs["json"]
-            else:
-                # Для httpx клиент может передавать данные иначе
-                if "content" in kwargs:
-                    self.last_request = json.loads(kwargs["content"])
-            
-            # Получаем следующий ответ из очереди или используем ответ по умолчанию
-            if self.responses:
-                response_data = self.responses.pop(0)
-            else:
-                response_data = self._default_response()
-            
-            return httpx.Response(
-                status_code=200,
-                content=json.dumps(response_data),
-                headers={"content-type": "application/json"}
-            )
+        _, separator, tail = url.rpartition("/v1/")
+        handler = self._routes.get((method, separator + tail)) if separator else None
+        if handler is None:
+            # Для других запросов возвращаем ошибку
+            return httpx.Response(status_code=404)
+        return handler(**kwargs)
+    
+    def _handle_chat(self, **kwargs) -> httpx.Response:
+        """Обрабатывает запрос к /v1/chat/completions."""
+        # Получаем тело запроса
+        if "json" in kwargs:
+            self.last_request = kwargs["json"]
+        else:
+            # Для httpx клиент может передавать данные иначе
+            if "content" in kwargs:
+                self.last_request = orjson.loads(kwargs["content"])
         
-        elif url.endswith("/v1/models") and method == "GET":
-            models_data = {
-                "object": "list",
-                "data": [
-                    {
-                        "id": "gpt-4o-mini",
-                        "object": "model",
-                        "created": 1677610602,
-                        "owned_by": "openai"
-                    }
-                ]
-            }
-            return httpx.Response(
-                status_code=200,
-                content=json.dumps(models_data),
-                headers={"content-type": "application/json"}
-            )
+        # Получаем следующий ответ из очереди или используем ответ по умолчанию
+        if self.responses:
+            response_data = self.responses.popleft()
+        else:
+            response_data = _DEFAULT_RESPONSE
         
-        # Для других запросов возвращаем ошибку
-        return httpx.Response(status_code=404)
+        # Ответ по умолчанию не изменяется, поэтому возвращается один и тот же объект
+        if response_data is _DEFAULT_RESPONSE:
+            if self._default_httpx_response is None:
+                self._default_httpx_response = httpx.Response(
+                    status_code=200,
+                    content=_DEFAULT_RESPONSE_BYTES,
+                    headers=_JSON_HEADERS
+                )
+            return self._default_httpx_response
+        
+        return httpx.Response(
+            status_code=200,
+            content=orjson.dumps(response_data),
+            headers=_JSON_HEADERS
+        )
     
-    def _default_response(self) -> Dict[str, Any]:
-        """Возвращает ответ по умолчанию."""
-        return {
-            "id": "chatcmpl-test",
-            "object": "chat.completion",
-            "created": 1677652288,
-            "model": "gpt-4o-mini",
-            "choices": [
+    def _handle_models(self, **kwargs) -> httpx.Response:
+        """Обрабатывает запрос к /v1/models."""
+        models_data = {
+            "object": "list",
+            "data": [
                 {
-                    "index": 0,
-                    "message": {
-                        "role": "assistant",
-                        "content": """## Основная тема
-
-Это тестовая страница, содержащая основную информацию о теме.
-
-## Ключевые моменты
-
-- Первый важный момент
-- Второй важный момент
-- Третий важный момент
-
-## Вывод
-
-На основе представленной информации можно сделать вывод о значимости данной темы."""
-                    },
-                    "finish_reason": "stop"
+                    "id": "gpt-4o-mini",
+                    "object": "model",
+                    "created": 1677610602,
+                    "owned_by": "openai"
                 }
-            ],
-            "usage": {
-                "prompt_tokens": 56,
-                "completion_tokens": 31,
-                "total_tokens": 87
-            }
+            ]
         }
+        return httpx.Response(
+            status_code=200,
+            content=orjson.dumps(models_data),
+            headers=_JSON_HEADERS
+        )
+    
+    def _default_response(self) -> ChatCompletionResponse:
+        """
+        Возвращает ответ по умолчанию.
+
+        Возвращается общий для всех серверов словарь, его нельзя изменять.
+        """
+        return _DEFAULT_RESPONSE
     
-    def add_response(self, response_data: Dict[str, Any]):
+    def add_response(self, response_data: Union[ChatCompletionResponse, Dict[str, Any]]):
         """Добавляет кастомный ответ в очередь."""
         self.responses.append(response_data)
     
@@ -131,7 +207,7 @@ class MockLLMServer:
     
     def reset(self):
         """Сбрасывает состояние сервера."""
-        self.responses = []
+        self.responses = deque()
         self.call_count = 0
         self.last_request = None
     
@@ -172,173 +248,112 @@ def mock_llm_server_with_errors():
     server.reset()
 
 
+# Тело запроса к chat/completions, используемое в тестах
+_CHAT_REQUEST = {
+    "model": "gpt-4o-mini",
+    "messages": [{"role": "user", "content": "Test"}]
+}
+
+
+_CUSTOM_RESPONSE = {
+    "id": "custom-test",
+    "choices": [
+        {
+            "message": {
+                "content": "Custom response content"
+            }
+        }
+    ]
+}
+
+
+def _check_default_response(data):
+    """Проверяет ответ по умолчанию."""
+    assert "choices" in data
+    assert len(data["choices"]) == 1
+    assert "content" in data["choices"][0]["message"]
+
+
+def _check_custom_response(data):
+    """Проверяет кастомный ответ."""
+    assert data["id"] == "custom-test"
+    assert data["choices"][0]["message"]["content"] == "Custom response content"
+
+
+def _check_error_response(data):
+    """Проверяет ответ с ошибкой."""
+    assert "error" in data
+    assert data["error"]["message"] == "Test error"
+
+
+def _check_rate_limit_response(data):
+    """Проверяет ответ с ошибкой rate limit."""
+    assert "error" in data
+    assert data["error"]["type"] == "rate_limit_error"
+
+
+# Сценарии chat/completions: подготовка очереди ответов и проверка результата
+_CHAT_SCENARIOS = [
+    pytest.param(lambda server: None, _check_default_response, id="default"),
+    pytest.param(
+        lambda server: server.add_response(_CUSTOM_RESPONSE),
+        _check_custom_response,
+        id="custom",
+    ),
+    pytest.param(
+        lambda server: server.add_error_response("Test error"),
+        _check_error_response,
+        id="error",
+    ),
+    pytest.param(
+        lambda server: server.add_rate_limit_response(),
+        _check_rate_limit_response,
+        id="rate_limit",
+    ),
+]
+
+
 @pytest.mark.asyncio
 class TestMockLLMServer:
     """Тесты для mock-сервера LLM."""
     
-    async def test_default_response(self, mock_llm_server):
-        """Тест ответа по умолчанию."""
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_post(url, **kwargs):
-                return await mock_llm_server.handle_request("POST", url, **kwargs)
-            
-            mock_client.post.side_effect = mock_post
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            response = await mock_client.post(
-                f"{mock_llm_server.get_base_url()}/v1/chat/completions",
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [{"role": "user", "content": "Test"}]
-                }
-            )
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert "choices" in data
-            assert len(data["choices"]) == 1
-            assert "content" in data["choices"][0]["message"]
-    
-    async def test_custom_response(self, mock_llm_server):
-        """Тест кастомного ответа."""
-        custom_response = {
-            "id": "custom-test",
-            "choices": [
-                {
-                    "message": {
-                        "content": "Custom response content"
-                    }
-                }
-            ]
-        }
-        mock_llm_server.add_response(custom_response)
-        
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_post(url, **kwargs):
-                return await mock_llm_server.handle_request("POST", url, **kwargs)
-            
-            mock_client.post.side_effect = mock_post
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            response = await mock_client.post(
-                f"{mock_llm_server.get_base_url()}/v1/chat/completions",
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [{"role": "user", "content": "Test"}]
-                }
-            )
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["id"] == "custom-test"
-            assert data["choices"][0]["message"]["content"] == "Custom response content"
-    
-    async def test_error_response(self, mock_llm_server):
-        """Тест ответа с ошибкой."""
-        mock_llm_server.add_error_response("Test error")
+    @pytest.mark.parametrize(("prepare", "check"), _CHAT_SCENARIOS)
+    async def test_chat_response(self, mock_llm_server, prepare, check):
+        """Тест ответов chat/completions: по умолчанию, кастомного и с ошибками."""
+        prepare(mock_llm_server)
         
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_post(url, **kwargs):
-                return await mock_llm_server.handle_request("POST", url, **kwargs)
-            
-            mock_client.post.side_effect = mock_post
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            response = await mock_client.post(
-                f"{mock_llm_server.get_base_url()}/v1/chat/completions",
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [{"role": "user", "content": "Test"}]
-                }
-            )
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert "error" in data
-            assert data["error"]["message"] == "Test error"
-    
-    async def test_rate_limit_response(self, mock_llm_server):
-        """Тест ответа с ошибкой rate limit."""
-        mock_llm_server.add_rate_limit_response()
+        response = await mock_llm_server.handle_request(
+            "POST",
+            f"{mock_llm_server.get_base_url()}/v1/chat/completions",
+            json=_CHAT_REQUEST
+        )
         
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_post(url, **kwargs):
-                return await mock_llm_server.handle_request("POST", url, **kwargs)
-            
-            mock_client.post.side_effect = mock_post
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            response = await mock_client.post(
-                f"{mock_llm_server.get_base_url()}/v1/chat/completions",
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [{"role": "user", "content": "Test"}]
-                }
-            )
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert "error" in data
-            assert data["error"]["type"] == "rate_limit_error"
+        assert response.status_code == 200
+        check(response.json())
     
     async def test_models_endpoint(self, mock_llm_server):
         """Тест endpoint для получения списка моделей."""
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_get(url, **kwargs):
-                return await mock_llm_server.handle_request("GET", url, **kwargs)
-            
-            mock_client.get.side_effect = mock_get
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            response = await mock_client.get(f"{mock_llm_server.get_base_url()}/v1/models")
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert "data" in data
-            assert len(data["data"]) > 0
-            assert data["data"][0]["id"] == "gpt-4o-mini"
+        response = await mock_llm_server.handle_request(
+            "GET", f"{mock_llm_server.get_base_url()}/v1/models"
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert "data" in data
+        assert len(data["data"]) > 0
+        assert data["data"][0]["id"] == "gpt-4o-mini"
     
     async def test_call_count_tracking(self, mock_llm_server):
         """Тест отслеживания количества вызовов."""
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_post(url, **kwargs):
-                return await mock_llm_server.handle_request("POST", url, **kwargs)
-            
-            mock_client.post.side_effect = mock_post
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            # Делаем несколько запросов
-            for _ in range(3):
-                await mock_client.post(
-                    f"{mock_llm_server.get_base_url()}/v1/chat/completions",
-                    json={
-                        "model": "gpt-4o-mini",
-                        "messages": [{"role": "user", "content": "Test"}]
-                    }
-                )
-            
-            assert mock_llm_server.call_count == 3
+        # Делаем несколько запросов
+        for _ in range(3):
+            await mock_llm_server.handle_request(
+                "POST",
+                f"{mock_llm_server.get_base_url()}/v1/chat/completions",
+                json=_CHAT_REQUEST
+            )
+        
+        assert mock_llm_server.call_count == 3
     
     async def test_request_tracking(self, mock_llm_server):
         """Тест отслеживания последнего запроса."""
@@ -348,67 +363,77 @@ class TestMockLLMServer:
             "temperature": 0.7
         }
         
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_post(url, **kwargs):
-                return await mock_llm_server.handle_request("POST", url, **kwargs)
-            
-            mock_client.post.side_effect = mock_post
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            await mock_client.post(
-                f"{mock_llm_server.get_base_url()}/v1/chat/completions",
-                json=request_data
-            )
-            
-            assert mock_llm_server.last_request is not None
-            assert mock_llm_server.last_request["model"] == "gpt-4o-mini"
-            assert mock_llm_server.last_request["messages"][0]["content"] == "Test message"
-            assert mock_llm_server.last_request["temperature"] == 0.7
+        await mock_llm_server.handle_request(
+            "POST",
+            f"{mock_llm_server.get_base_url()}/v1/chat/completions",
+            json=request_data
+        )
+        
+        assert mock_llm_server.last_request is not None
+        assert mock_llm_server.last_request["model"] == "gpt-4o-mini"
+        assert mock_llm_server.last_request["messages"][0]["content"] == "Test message"
+        assert mock_llm_server.last_request["temperature"] == 0.7
+    
+    async def test_unknown_route(self, mock_llm_server):
+        """Тест ответа 404 для неизвестного пути или метода."""
+        base_url = mock_llm_server.get_base_url()
+        
+        for method, url in (
+            ("GET", f"{base_url}/v1/chat/completions"),
+            ("POST", f"{base_url}/v1/unknown"),
+            ("GET", f"{base_url}/models"),
+        ):
+            response = await mock_llm_server.handle_request(method, url)
+            assert response.status_code == 404
+        
+        assert mock_llm_server.call_count == 3
+    
+    async def test_request_tracking_raw_content(self, mock_llm_server):
+        """Тест отслеживания запроса, переданного телом в байтах."""
+        request_data = {
+            "model": "gpt-4o-mini",
+            "messages": [{"role": "user", "content": "Тестовое сообщение"}]
+        }
+        
+        response = await mock_llm_server.handle_request(
+            "POST",
+            f"{mock_llm_server.get_base_url()}/v1/chat/completions",
+            content=orjson.dumps(request_data)
+        )
+        
+        assert response.status_code == 200
+        assert mock_llm_server.last_request == request_data
     
     async def test_reset_functionality(self, mock_llm_server):
         """Тест функциональности сброса."""
         # Добавляем ответ и делаем запрос
         mock_llm_server.add_response({"test": "response"})
         
-        # Используем мокирование httpx.AsyncClient вместо реальных HTTP-запросов
-        with patch('httpx.AsyncClient') as mock_client_class:
-            mock_client = AsyncMock()
-            
-            # Создаем обертку для handle_request, которая принимает правильные аргументы
-            async def mock_post(url, **kwargs):
-                return await mock_llm_server.handle_request("POST", url, **kwargs)
-            
-            mock_client.post.side_effect = mock_post
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-            
-            await mock_client.post(
-                f"{mock_llm_server.get_base_url()}/v1/chat/completions",
-                json={
-                    "model": "gpt-4o-mini",
-                    "messages": [{"role": "user", "content": "Test"}]
-                }
-            )
-            
-            assert mock_llm_server.call_count == 1
-            assert len(mock_llm_server.responses) == 0  # Ответ был использован
-            
-            # Сбрасываем состояние
-            mock_llm_server.reset()
-            
-            assert mock_llm_server.call_count == 0
-            assert mock_llm_server.last_request is None
-            assert len(mock_llm_server.responses) == 0
+        await mock_llm_server.handle_request(
+            "POST",
+            f"{mock_llm_server.get_base_url()}/v1/chat/completions",
+            json=_CHAT_REQUEST
+        )
+        
+        assert mock_llm_server.call_count == 1
+        assert len(mock_llm_server.responses) == 0  # Ответ был использован
+        
+        # Сбрасываем состояние
+        mock_llm_server.reset()
+        
+        assert mock_llm_server.call_count == 0
+        assert mock_llm_server.last_request is None
+        assert len(mock_llm_server.responses) == 0
 
 
 @pytest.mark.asyncio
+@pytest.mark.skipif(
+    not os.getenv("RUN_INTEGRATION"),
+    reason="Тест требует сложного мокирования AsyncOpenAI клиента; включается через RUN_INTEGRATION=1",
+)
 class TestMockLLMServerIntegration:
     """Интеграционные тесты для mock-сервера LLM."""
     
-    @pytest.mark.skip("Тест требует сложного мокирования AsyncOpenAI клиента")
     async def test_integration_with_summarizer(self, mock_llm_server, temp_dir, sample_config):
         """Тест интеграции с ContentSummarizer."""
         from src.summarizer import ContentSummarizer
@@ -433,19 +458,7 @@ class TestMockLLMServerIntegration:
             # Создаем мок для ответа API
             mock_response = AsyncMock()
             mock_response.choices = [AsyncMock()]
-            mock_response.choices[0].message.content = """## Основная тема
-
-Это тестовая страница, содержащая основную информацию о теме.
-
-## Ключевые моменты
-
-- Первый важный момент
-- Второй важный момент
-- Третий важный момент
-
-## Вывод
-
-На основе представленной информации можно сделать вывод о значимости данной темы."""
+            mock_response.choices[0].message.content = _SAMPLE_SUMMARY
             
             # Создаем асинхронную функцию-мок с использованием AsyncMock и spec_set
             from unittest.mock import MagicMock
@@ -1,9 +1,10 @@
 """
 Тесты для модуля parser.py
 """
+import io
 import json
-import tempfile
-import os
+
+import orjson
 import pytest
 from datetime import datetime
 from unittest.mock import patch, mock_open
@@ -11,183 +12,146 @@ from src.parser import BookmarkParser
 from src.models import Bookmark, BookmarkFolder
 
 
+@pytest.fixture(scope="module")
+def parser():
+    """Парсер закладок без состояния, общий для тестов модуля."""
+    return BookmarkParser()
+
+
 class TestBookmarkParser:
     """Тесты для класса BookmarkParser"""
     
-    def test_parse_chrome_bookmarks(self):
+    def test_parse_chrome_bookmarks(self, parsed_chrome_tree):
         """Тестирует парсинг JSON-файла закладок Chrome"""
-        # Создаем временный файл с тестовыми данными закладок
-        test_data = {
-            "checksum": "12345",
-            "roots": {
-                "bookmark_bar": {
-                    "children": [
-                        {
-                            "date_added": "13321112345678901",
-                            "id": "1",
-                            "name": "Test Bookmark",
-                            "type": "url",
-                            "url": "https://example.com"
-                        },
-                        {
-                            "children": [
-                                {
-                                    "date_added": "13321112345678902",
-                                    "id": "3",
-                                    "name": "Nested Bookmark",
-                                    "type": "url",
-                                    "url": "https://nested-example.com"
-                                }
-                            ],
-                            "date_added": "13321112345678900",
-                            "id": "2",
-                            "name": "Test Folder",
-                            "type": "folder"
-                        }
-                    ],
-                    "date_added": "13321112345678900",
-                    "id": "0",
-                    "name": "Bookmark Bar",
-                    "type": "folder"
-                },
-                "other": {
-                    "children": [],
-                    "date_added": "13321112345678900",
-                    "id": "4",
-                    "name": "Other bookmarks",
-                    "type": "folder"
-                },
-                "synced": {
-                    "children": [],
-                    "date_added": "13321112345678900",
-                    "id": "5",
-                    "name": "Mobile bookmarks",
-                    "type": "folder"
-                }
-            },
-            "version": 1
-        }
-
-        # Создаем временный файл
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as temp_file:
-            json.dump(test_data, temp_file)
-            temp_file_path = temp_file.name
-
-        try:
-            # Вызываем функцию парсинга
-            parser = BookmarkParser()
-            data = parser.load_json(temp_file_path)
-            result = parser.parse_bookmarks(data)
+        result = parsed_chrome_tree
 
-            # Проверяем результат
-            assert isinstance(result, BookmarkFolder)
-            assert result.name == "Root"
-            assert len(result.children) == 3  # Bookmark Bar, Other и Mobile папки
+        # Проверяем результат
+        assert isinstance(result, BookmarkFolder)
+        assert result.name == "Root"
+        assert len(result.children) == 3  # Bookmark Bar, Other и Mobile папки
 
-            # Находим папку Bookmark Bar
-            bookmark_bar = None
-            other_folder = None
-            mobile_folder = None
-            
-            for child in result.children:
-                if child.name == "Bookmark Bar":
-                    bookmark_bar = child
-                elif child.name == "Other bookmarks":
-                    other_folder = child
-                elif child.name == "Mobile bookmarks":
-                    mobile_folder = child
-            
-            assert bookmark_bar is not None
-            assert other_folder is not None
-            assert mobile_folder is not None
-            
-            # Проверяем, что Other и Mobile папки пусты
-            assert len(other_folder.children) == 0
-            assert len(other_folder.bookmarks) == 0
-            assert len(mobile_folder.children) == 0
-            assert len(mobile_folder.bookmarks) == 0
+        # Находим папки дерева по имени за один обход
+        by_name = {folder.name: folder for folder in result.walk()}
+        bookmark_bar = by_name["Bookmark Bar"]
+        other_folder = by_name["Other bookmarks"]
+        mobile_folder = by_name["Mobile bookmarks"]
+        
+        # Проверяем, что Other и Mobile папки пусты
+        assert len(other_folder.children) == 0
+        assert len(other_folder.bookmarks) == 0
+        assert len(mobile_folder.children) == 0
+        assert len(mobile_folder.bookmarks) == 0
 
-            # Проверяем, что дочерние элементы Bookmark Bar корректны
-            assert len(bookmark_bar.children) == 1  # Папка "Test Folder"
-            assert len(bookmark_bar.bookmarks) == 1  # Закладка "Test Bookmark"
+        # Проверяем, что дочерние элементы Bookmark Bar корректны
+        assert len(bookmark_bar.children) == 1  # Папка "Test Folder"
+        assert len(bookmark_bar.bookmarks) == 1  # Закладка "Test Bookmark"
 
-            # Проверяем папку
-            test_folder = bookmark_bar.children[0]
-            assert test_folder.name == "Test Folder"
-            assert len(test_folder.bookmarks) == 1
-            assert test_folder.bookmarks[0].title == "Nested Bookmark"
-            assert test_folder.bookmarks[0].url == "https://nested-example.com"
+        # Проверяем папку
+        test_folder = by_name["Test Folder"]
+        assert bookmark_bar.children == [test_folder]
+        assert len(test_folder.bookmarks) == 1
+        assert test_folder.bookmarks[0].title == "Nested Bookmark"
+        assert test_folder.bookmarks[0].url == "https://nested-example.com"
 
-            # Проверяем закладку
-            test_bookmark = bookmark_bar.bookmarks[0]
-            assert test_bookmark.title == "Test Bookmark"
-            assert test_bookmark.url == "https://example.com"
-            assert isinstance(test_bookmark.date_added, datetime)
-        finally:
-            # Удаляем временный файл
-            os.unlink(temp_file_path)
+        # Проверяем закладку
+        test_bookmark = bookmark_bar.bookmarks[0]
+        assert test_bookmark.title == "Test Bookmark"
+        assert test_bookmark.url == "https://example.com"
+        # 13321112345678901 мкс с 1601 года соответствуют февралю 2023 года
+        assert test_bookmark.date_added == datetime.fromtimestamp(1676638745.678901)
+        assert test_bookmark.date_added.year == 2023
+    
+    def test_parse_bookmarks_consume(self, parser, chrome_bookmarks_blob, parsed_chrome_tree):
+        """Тестирует разбор с освобождением обработанных узлов JSON"""
+        data = parser.load_json(chrome_bookmarks_blob)
+        roots = data["roots"]
+        
+        result = parser.parse_bookmarks(data, consume=True)
+        
+        # Дерево совпадает с обычным разбором, а разобранные узлы извлечены из data
+        assert result == parsed_chrome_tree
+        assert "roots" not in data
+        assert not {"bookmark_bar", "other", "synced"} & roots.keys()
     
-    def test_load_json_file_not_found(self):
+    def test_folder_get_child_index(self):
+        """Тестирует поиск вложенной папки по имени через индекс"""
+        root = BookmarkFolder(name="Root", children=[], bookmarks=[])
+        first = BookmarkFolder(name="Docs", children=[], bookmarks=[])
+        root.add_child(first)
+        root.add_child(BookmarkFolder(name="Docs", children=[], bookmarks=[]))
+        
+        assert root.get_child("Docs") is first
+        assert root.get_child("Missing") is None
+        
+        # Прямое изменение children учитывается при следующем поиске
+        news = BookmarkFolder(name="News", children=[], bookmarks=[])
+        root.children.append(news)
+        assert root.get_child("News") is news
+    
+    def test_load_json_from_stream(self, parser):
+        """Тестирует загрузку JSON из бинарного файлового объекта"""
+        stream = io.BytesIO(b'{"roots": {"other": {"name": "Other", "type": "folder"}}}')
+        
+        data = parser.load_json(stream)
+        
+        assert data["roots"]["other"]["name"] == "Other"
+    
+    def test_load_json_file_not_found(self, parser):
         """Тестирует обработку отсутствующего файла"""
-        parser = BookmarkParser()
         with pytest.raises(FileNotFoundError):
             parser.load_json("nonexistent_file.json")
     
-    def test_load_json_invalid_json(self):
+    def test_load_json_invalid_json(self, parser, tmp_path):
         """Тестирует обработку некорректного JSON"""
-        # Создаем временный файл с некорректным JSON
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as temp_file:
-            temp_file.write('{"invalid": json}')
-            temp_file_path = temp_file.name
+        bookmarks_file = tmp_path / "invalid.json"
+        bookmarks_file.write_bytes(b'{"invalid": json}')
         
-        try:
-            parser = BookmarkParser()
-            with pytest.raises(json.JSONDecodeError):
-                parser.load_json(temp_file_path)
-        finally:
-            os.unlink(temp_file_path)
+        with pytest.raises(json.JSONDecodeError):
+            parser.load_json(str(bookmarks_file))
     
-    def test_load_json_invalid_structure(self):
-        """Тестирует валидацию структуры JSON"""
-        # Тест 1: JSON не является словарем
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as temp_file:
-            json.dump(["not", "a", "dict"], temp_file)
-            temp_file_path = temp_file.name
-        
-        try:
-            parser = BookmarkParser()
-            with pytest.raises(ValueError, match="JSON должен быть словарем"):
-                parser.load_json(temp_file_path)
-        finally:
-            os.unlink(temp_file_path)
-        
-        # Тест 2: Отсутствует поле 'roots'
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as temp_file:
-            json.dump({"not_roots": {}}, temp_file)
-            temp_file_path = temp_file.name
+    def test_load_json_empty_file(self, parser, tmp_path):
+        """Тестирует обработку пустого файла, который нельзя отобразить в память"""
+        bookmarks_file = tmp_path / "empty.json"
+        bookmarks_file.write_bytes(b"")
+
+        with pytest.raises(json.JSONDecodeError):
+            parser.load_json(str(bookmarks_file))
+    
+    def test_load_json_without_orjson(self, parser, tmp_path):
+        """Тестирует загрузку JSON через стандартный модуль json"""
+        bookmarks_file = tmp_path / "bookmarks.json"
+        bookmarks_file.write_text(
+            json.dumps({"roots": {"bookmark_bar": {"name": "Панель", "type": "folder"}}}),
+            encoding="utf-8",
+        )
         
-        try:
-            parser = BookmarkParser()
-            with pytest.raises(ValueError, match="Отсутствует обязательное поле 'roots'"):
-                parser.load_json(temp_file_path)
-        finally:
-            os.unlink(temp_file_path)
+        with patch("src.parser.orjson", None):
+            data = parser.load_json(str(bookmarks_file))
         
-        # Тест 3: Поле 'roots' не является словарем
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json') as temp_file:
-            json.dump({"roots": "not_a_dict"}, temp_file)
-            temp_file_path = temp_file.name
+        assert data["roots"]["bookmark_bar"]["name"] == "Панель"
+    
+    @pytest.mark.parametrize(
+        ("test_data", "message"),
+        [
+            pytest.param(["not", "a", "dict"], "JSON должен быть словарем", id="not_dict"),
+            pytest.param(
+                {"not_roots": {}}, "Отсутствует обязательное поле 'roots'", id="missing_roots"
+            ),
+            pytest.param(
+                {"roots": "not_a_dict"}, "Поле 'roots' должно быть словарем", id="roots_not_dict"
+            ),
+        ],
+    )
+    def test_load_json_invalid_structure(self, parser, tmp_path, test_data, message):
+        """Тестирует валидацию структуры JSON"""
+        bookmarks_file = tmp_path / "bookmarks.json"
+        bookmarks_file.write_bytes(orjson.dumps(test_data))
         
-        try:
-            parser = BookmarkParser()
-            with pytest.raises(ValueError, match="Поле 'roots' должно быть словарем"):
-                parser.load_json(temp_file_path)
-        finally:
-            os.unlink(temp_file_path)
+        with pytest.raises(ValueError, match=message):
+            parser.load_json(str(bookmarks_file))
     
-    def test_parse_bookmarks_empty_roots(self):
+    def test_parse_bookmarks_empty_roots(self, parser):
         """Тестирует парсинг с пустыми корневыми разделами"""
-        parser = BookmarkParser()
         data = {"roots": {}}
         result = parser.parse_bookmarks(data)
         
@@ -196,9 +160,8 @@ class TestBookmarkParser:
         assert len(result.children) == 0
         assert len(result.bookmarks) == 0
     
-    def test_parse_bookmarks_missing_roots(self):
+    def test_parse_bookmarks_missing_roots(self, parser):
         """Тестирует парсинг с отсутствующим полем roots"""
-        parser = BookmarkParser()
         data = {}
         result = parser.parse_bookmarks(data)
         
@@ -207,9 +170,8 @@ class TestBookmarkParser:
         assert len(result.children) == 0
         assert len(result.bookmarks) == 0
     
-    def test_traverse_node_folder_without_type(self):
+    def test_traverse_node_folder_without_type(self, parser):
         """Тестирует обработку папки без указания типа"""
-        parser = BookmarkParser()
         node = {
             "name": "Folder without type",
             "children": [
@@ -230,9 +192,8 @@ class TestBookmarkParser:
         assert result.bookmarks[0].title == "Bookmark"
         assert result.bookmarks[0].url == "https://example.com"
     
-    def test_traverse_node_empty_title(self):
+    def test_traverse_node_empty_title(self, parser):
         """Тестирует обработку узла с пустым заголовком"""
-        parser = BookmarkParser()
         node = {
             "name": "",
             "type": "url",
@@ -246,9 +207,8 @@ class TestBookmarkParser:
         assert result.title == "Untitled"
         assert result.url == "https://example.com"
     
-    def test_traverse_node_unknown_type(self):
+    def test_traverse_node_unknown_type(self, parser):
         """Тестирует обработку узла с неизвестным типом"""
-        parser = BookmarkParser()
         node = {
             "name": "Unknown type node",
             "type": "unknown_type"
@@ -257,9 +217,27 @@ class TestBookmarkParser:
         result = parser._traverse_node(node)
         assert result is None
     
-    def test_traverse_node_bookmark_without_url(self):
+    def test_traverse_node_kind_tags(self, parser):
+        """Тестирует теги типа KIND у узлов, возвращаемых обходом"""
+        node = {
+            "name": "Folder",
+            "type": "folder",
+            "children": [
+                {"name": "Link", "type": "url", "url": "https://example.com"},
+                {"name": "Empty", "type": "folder", "children": []},
+            ],
+        }
+
+        result = parser._traverse_node(node)
+
+        assert result.KIND == "folder"
+        assert result.bookmarks[0].KIND == "url"
+        assert result.children[0].KIND == "folder"
+        assert Bookmark.KIND == "url"
+        assert BookmarkFolder.KIND == "folder"
+
+    def test_traverse_node_bookmark_without_url(self, parser):
         """Тестирует обработку закладки без URL"""
-        parser = BookmarkParser()
         node = {
             "name": "Bookmark without URL",
             "type": "url"
@@ -268,9 +246,8 @@ class TestBookmarkParser:
         result = parser._traverse_node(node)
         assert result is None
     
-    def test_traverse_node_invalid_date_added(self):
+    def test_traverse_node_invalid_date_added(self, parser):
         """Тестирует обработку закладки с некорректной датой"""
-        parser = BookmarkParser()
         node = {
             "name": "Bookmark with invalid date",
             "type": "url",
@@ -278,16 +255,27 @@ class TestBookmarkParser:
             "date_added": "invalid_date"
         }
         
-        result = parser._traverse_node(node)
+        # Нечисловая метка отбрасывается до вызова преобразования
+        with patch("src.parser.chrome_timestamp_to_datetime") as convert:
+            result = parser._traverse_node(node)
+        convert.assert_not_called()
         
         assert isinstance(result, Bookmark)
         assert result.title == "Bookmark with invalid date"
         assert result.url == "https://example.com"
         assert result.date_added is None
+
+    def test_traverse_node_missing_date_added(self, parser):
+        """Тестирует закладку без даты добавления"""
+        node = {"name": "No date", "type": "url", "url": "https://example.com"}
+
+        result = parser._traverse_node(node)
+
+        assert isinstance(result, Bookmark)
+        assert result.date_added is None
     
-    def test_traverse_node_nested_structure(self):
+    def test_traverse_node_nested_structure(self, parser):
         """Тестирует обработку вложенной структуры папок и закладок"""
-        parser = BookmarkParser()
         node = {
             "name": "Root Folder",
             "type": "folder",
@@ -344,7 +332,7 @@ class TestBookmarkParser:
         assert root_bookmark.title == "Root Bookmark"
         assert root_bookmark.url == "https://root.example.com"
     
-    def test_parse_bookmarks_with_special_characters(self):
+    def test_parse_bookmarks_with_special_characters(self, parser):
         """Тестирует парсинг закладок со специальными символами в названиях"""
         test_data = {
             "roots": {
@@ -373,7 +361,6 @@ class TestBookmarkParser:
             }
         }
         
-        parser = BookmarkParser()
         result = parser.parse_bookmarks(test_data)
         
         assert isinstance(result, BookmarkFolder)
@@ -389,6 +376,55 @@ class TestBookmarkParser:
         folder = result.children[0].children[0]
         assert "кавычками" in folder.name
 
+    def test_load_bookmarks_uses_cache(self, parser, tmp_path):
+        """Тестирует повторную загрузку дерева закладок из кеша"""
+        bookmarks_file = tmp_path / "bookmarks.json"
+        cache_file = tmp_path / "output" / "cache.pkl"
+        test_data = {
+            "roots": {
+                "bookmark_bar": {
+                    "name": "Bookmark Bar",
+                    "type": "folder",
+                    "children": [
+                        {"name": "Cached", "type": "url", "url": "https://example.com"}
+                    ]
+                }
+            }
+        }
+        bookmarks_file.write_bytes(orjson.dumps(test_data))
+
+        first = parser.load_bookmarks(str(bookmarks_file), cache_file=str(cache_file))
+        assert cache_file.exists()
+
+        with patch.object(parser, "load_json") as mock_load_json:
+            second = parser.load_bookmarks(str(bookmarks_file), cache_file=str(cache_file))
+            mock_load_json.assert_not_called()
+        assert second == first
+
+        # Изменение исходного файла делает кеш недействительным
+        test_data["roots"]["bookmark_bar"]["children"].append(
+            {"name": "New", "type": "url", "url": "https://new.example.com"}
+        )
+        bookmarks_file.write_bytes(orjson.dumps(test_data))
+        third = parser.load_bookmarks(str(bookmarks_file), cache_file=str(cache_file))
+        assert len(third.children[0].bookmarks) == 2
+
+    def test_traverse_node_deep_nesting(self, parser):
+        """Тестирует обход вложенности глубже лимита рекурсии Python"""
+        depth = 3000
+        node = {"name": "Leaf", "type": "url", "url": "https://deep.example.com"}
+        for level in range(depth):
+            node = {"name": f"Level {level}", "type": "folder", "children": [node]}
+
+        result = parser._traverse_node(node)
+
+        levels = 0
+        while result.children:
+            result = result.children[0]
+            levels += 1
+        assert levels == depth - 1
+        assert result.bookmarks[0].url == "https://deep.example.com"
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -3,11 +3,9 @@
 Проверяют функционал сохранения и восстановления прогресса обработки закладок.
 """
 import json
-import tempfile
-import shutil
 from pathlib import Path
 from datetime import datetime
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, mock_open, patch
 
 import pytest
 
@@ -18,15 +16,32 @@ from src.progress import (
 from src.models import Bookmark
 
 
+# Фиксированная дата добавления тестовых закладок
+_FIXED_DATETIME = datetime(2025, 1, 1, 12, 0, 0)
+
+# Файл прогресса с хешем другой конфигурации, сериализуется один раз при импорте
+_INCOMPATIBLE_PROGRESS_JSON = json.dumps({
+    "version": "1.0",
+    "timestamp": "2025-01-01T12:00:00",
+    "bookmarks_file": "test_bookmarks.json",
+    "config_hash": "different_hash",
+    "processed_urls": [],
+    "failed_urls": []
+})
+
+
 class TestProgressManager:
     """Тесты для класса ProgressManager."""
     
     @pytest.fixture
-    def temp_dir(self):
-        """Создает временную директорию для тестов."""
-        temp_dir = tempfile.mkdtemp()
-        yield Path(temp_dir)
-        shutil.rmtree(temp_dir)
+    def temp_dir(self, tmp_path):
+        """
+        Возвращает временную директорию теста.
+
+        Удалением старых директорий управляет pytest, поэтому каждый тест
+        не выполняет собственный rmtree.
+        """
+        return tmp_path
     
     @pytest.fixture
     def sample_config(self):
@@ -56,7 +71,7 @@ class TestProgressManager:
         return Bookmark(
             title="Test Bookmark",
             url="https://example.com",
-            date_added=datetime.now()
+            date_added=_FIXED_DATETIME
         )
     
     def test_init_progress_manager(self, temp_dir, sample_config):
@@ -131,22 +146,23 @@ class TestProgressManager:
     
     def test_load_progress_incompatible_config(self, progress_manager, temp_dir):
         """Тест загрузки прогресса с несовместимой конфигурацией."""
-        # Создаем файл прогресса с другим хешем
-        progress_data = {
-            "version": "1.0",
-            "timestamp": datetime.now().isoformat(),
-            "bookmarks_file": "test_bookmarks.json",
-            "config_hash": "different_hash",
-            "processed_urls": [],
-            "failed_urls": []
-        }
-        
-        with open(progress_manager.progress_file, 'w', encoding='utf-8') as f:
-            json.dump(progress_data, f)
+        # Файл прогресса подменяется в памяти: реальная запись и чтение
+        # проверяются в test_save_and_load_progress
+        with patch.object(Path, "exists", return_value=True), patch(
+            "src.progress.open", mock_open(read_data=_INCOMPATIBLE_PROGRESS_JSON)
+        ):
+            result = progress_manager.load_progress()
+        assert result is False
+    
+    def test_load_progress_missing_file(self, progress_manager):
+        """Тест загрузки прогресса при отсутствии файла."""
+        with patch.object(Path, "exists", return_value=False), patch(
+            "src.progress.open"
+        ) as mock_file:
+            result = progress_manager.load_progress()
         
-        # Пытаемся загрузить прогресс
-        result = progress_manager.load_progress()
         assert result is False
+        mock_file.assert_not_called()
     
     def test_get_processed_urls(self, progress_manager, sample_bookmark):
         """Тест получения множества обработанных URL."""
@@ -161,7 +177,7 @@ class TestProgressManager:
         bookmark2 = Bookmark(
             title="Test Bookmark 2",
             url="https://example2.com",
-            date_added=datetime.now()
+            date_added=_FIXED_DATETIME
         )
         progress_manager.add_processed_bookmark(
             bookmark2, 
@@ -188,7 +204,7 @@ class TestProgressManager:
         bookmark2 = Bookmark(
             title="Test Bookmark 2",
             url="https://example2.com",
-            date_added=datetime.now()
+            date_added=_FIXED_DATETIME
         )
         progress_manager.add_failed_bookmark(
             bookmark2, 
@@ -201,6 +217,86 @@ class TestProgressManager:
         assert len(urls) == 2
         assert sample_bookmark.url in urls
         assert bookmark2.url in urls
+
+    def test_get_failed_urls_union_view(self, progress_manager, sample_bookmark):
+        """Тест объединения URL с ошибками без копирования множеств."""
+        progress_manager.add_failed_bookmark(sample_bookmark, "Error", ["Root"])
+        progress_manager.processed_bookmarks = [
+            ProcessedBookmark(
+                url=sample_bookmark.url, title="Dup", processed_at="", error="Error"
+            ),
+            ProcessedBookmark(
+                url="https://error.example.com", title="E", processed_at="", error="Error"
+            ),
+        ]
+
+        all_errors = progress_manager.get_failed_urls(include_error_from_processed=True)
+
+        # URL из обоих множеств учитывается один раз
+        assert len(all_errors) == 2
+        assert all_errors == {sample_bookmark.url, "https://error.example.com"}
+        assert sorted(all_errors) == sorted({sample_bookmark.url, "https://error.example.com"})
+    
+    def test_url_index_tracks_mutations(self, progress_manager, sample_bookmark):
+        """Тест согласованности индекса URL при добавлении и перемещении закладок."""
+        progress_manager.add_failed_bookmark(sample_bookmark, "Error", ["Root"])
+        assert sample_bookmark.url in progress_manager.get_failed_urls()
+        assert sample_bookmark.url not in progress_manager.get_processed_urls()
+
+        moved = progress_manager.move_failed_to_processed(
+            sample_bookmark, "test_file.md", ["Root"]
+        )
+        assert moved is True
+        assert sample_bookmark.url not in progress_manager.get_failed_urls()
+        assert sample_bookmark.url in progress_manager.get_processed_urls()
+
+        progress_manager.clear_progress()
+        assert len(progress_manager.get_processed_urls()) == 0
+
+    def test_records_keyed_by_url(self, progress_manager, sample_bookmark, temp_dir):
+        """Тест хранения одной записи на URL: повторная запись заменяет прежнюю."""
+        progress_manager.add_processed_bookmark(sample_bookmark, "old.md", ["Root"])
+        bookmark2 = Bookmark(title="B2", url="https://example2.com", date_added=None)
+        progress_manager.add_processed_bookmark(bookmark2, "b.md", ["Root"])
+        progress_manager.add_processed_bookmark(sample_bookmark, "new.md", ["Root"])
+        progress_manager.add_failed_bookmark(bookmark2, "Error 1", ["Root"])
+        progress_manager.add_failed_bookmark(bookmark2, "Error 2", ["Root"])
+
+        assert [item.file_path for item in progress_manager.processed_bookmarks] == [
+            "b.md", "new.md"
+        ]
+        assert [item.error for item in progress_manager.failed_bookmarks] == ["Error 2"]
+        assert set(progress_manager.get_processed_urls()) == {
+            sample_bookmark.url, bookmark2.url
+        }
+
+        progress_manager.force_save()
+        with open(progress_manager.progress_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert len(data['processed_urls']) == 2
+        assert len(data['failed_urls']) == 1
+
+    def test_folder_path_shared_between_bookmarks(self, progress_manager, temp_dir, sample_config):
+        """Тест разделения одного кортежа пути между закладками одной папки."""
+        for i in range(3):
+            bookmark = Bookmark(title=f"Bookmark {i}", url=f"https://example.com/{i}", date_added=None)
+            progress_manager.add_processed_bookmark(bookmark, f"file_{i}.md", ["Root", "Subfolder"])
+
+        paths = [item.folder_path for item in progress_manager.processed_bookmarks]
+        assert paths[0] == ("Root", "Subfolder")
+        assert all(path is paths[0] for path in paths)
+
+        # В JSON путь сохраняется списком и снова разделяется после загрузки
+        progress_manager.force_save()
+        with open(progress_manager.progress_file, "r", encoding="utf-8") as f:
+            assert json.load(f)["processed_urls"][0]["folder_path"] == ["Root", "Subfolder"]
+
+        new_manager = ProgressManager(
+            str(temp_dir), "test_bookmarks.json", calculate_config_hash(sample_config)
+        )
+        assert new_manager.load_progress()
+        loaded = [item.folder_path for item in new_manager.processed_bookmarks]
+        assert all(path is loaded[0] for path in loaded)
     
     def test_get_resume_position(self, progress_manager):
         """Тест получения позиции для возобновления."""
@@ -238,6 +334,7 @@ class TestProgressManager:
         """Тест периодического сохранения прогресса."""
         # Устанавливаем интервал сохранения
         progress_manager.save_interval = 1
+        progress_manager.flush_interval = 0.0
         
         # Добавляем закладку (должно сохраниться)
         progress_manager.add_processed_bookmark(
@@ -253,7 +350,7 @@ class TestProgressManager:
         bookmark2 = Bookmark(
             title="Test Bookmark 2",
             url="https://example2.com",
-            date_added=datetime.now()
+            date_added=_FIXED_DATETIME
         )
         progress_manager.add_processed_bookmark(
             bookmark2,
@@ -261,13 +358,274 @@ class TestProgressManager:
             ["Root"]
         )
         
-        # Проверяем, что файл существует и содержит данные
-        assert progress_manager.progress_file.exists()
-        
+        # Первое сохранение записывает снимок, следующее - только журнал
         with open(progress_manager.progress_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        assert len(data['processed_urls']) == 2
+        assert len(data['processed_urls']) == 1
+        assert progress_manager.journal_file.exists()
+
+        # Снимок и журнал вместе восстанавливают обе закладки
+        new_manager = ProgressManager(
+            output_dir=str(progress_manager.output_dir),
+            bookmarks_file="test_bookmarks.json",
+            config_hash=progress_manager.config_hash
+        )
+        assert new_manager.load_progress() is True
+        assert [item.url for item in new_manager.processed_bookmarks] == [
+            "https://example.com", "https://example2.com"
+        ]
+
+    def test_force_save_compacts_journal(self, progress_manager, sample_bookmark):
+        """Тест объединения журнала со снимком при принудительном сохранении."""
+        progress_manager.save_interval = 1
+        progress_manager.flush_interval = 0.0
+        progress_manager.add_processed_bookmark(sample_bookmark, "a.md", ["Root"])
+        progress_manager.add_failed_bookmark(sample_bookmark, "Test error", ["Root"])
+        assert progress_manager.journal_file.exists()
+
+        assert progress_manager.force_save() is True
+
+        assert not progress_manager.journal_file.exists()
+        with open(progress_manager.progress_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert len(data['processed_urls']) == 1
+        assert len(data['failed_urls']) == 1
+
+    def test_periodic_save_coalesced_with_default_window(
+        self, progress_manager, sample_bookmark, monkeypatch
+    ):
+        """Тест объединения сохранений в окне по умолчанию."""
+        clock = [100.0]
+        monkeypatch.setattr("src.progress.time.monotonic", lambda: clock[0])
+        progress_manager.save_interval = 1
+
+        progress_manager.add_processed_bookmark(sample_bookmark, "a.md", ["Root"])
+        assert progress_manager.progress_file.exists()
+
+        # Изменение внутри окна flush_interval не записывается сразу
+        clock[0] += progress_manager.flush_interval / 2
+        bookmark = Bookmark(title="B2", url="https://example2.com", date_added=None)
+        progress_manager.add_processed_bookmark(bookmark, "b.md", ["Root"])
+        assert not progress_manager.journal_file.exists()
+        assert len(progress_manager._pending) == 1
+
+        # По истечении окна накопленные изменения записываются одним пакетом
+        clock[0] += progress_manager.flush_interval
+        bookmark = Bookmark(title="B3", url="https://example3.com", date_added=None)
+        progress_manager.add_processed_bookmark(bookmark, "c.md", ["Root"])
+        assert progress_manager.journal_file.exists()
+        assert progress_manager._pending == []
+
+    def test_periodic_save_batches_within_flush_interval(
+        self, progress_manager, sample_bookmark, monkeypatch
+    ):
+        """Тест объединения изменений в пакет в пределах окна сохранения."""
+        clock = [100.0]
+        monkeypatch.setattr("src.progress.time.monotonic", lambda: clock[0])
+        progress_manager.save_interval = 1
+        progress_manager.flush_interval = 5.0
+        progress_manager.max_batch = 3
+
+        progress_manager.add_processed_bookmark(sample_bookmark, "a.md", ["Root"])
+        assert progress_manager.progress_file.exists()
+
+        # В пределах окна изменения накапливаются
+        for i in range(2):
+            bookmark = Bookmark(title=f"B{i}", url=f"https://example{i}.com", date_added=None)
+            progress_manager.add_processed_bookmark(bookmark, f"{i}.md", ["Root"])
+        assert not progress_manager.journal_file.exists()
+
+        # Пакет размера max_batch записывается, не дожидаясь окна
+        bookmark = Bookmark(title="B2", url="https://example2.com", date_added=None)
+        progress_manager.add_processed_bookmark(bookmark, "2.md", ["Root"])
+        assert progress_manager.journal_file.exists()
+        assert progress_manager._pending == []
+
+        # После окна записывается и одиночное изменение
+        clock[0] += 5.0
+        bookmark = Bookmark(title="B3", url="https://example3.com", date_added=None)
+        progress_manager.add_processed_bookmark(bookmark, "3.md", ["Root"])
+        assert progress_manager._pending == []
+
+    def test_removals_are_journaled(self, progress_manager, sample_bookmark, temp_dir):
+        """Тест записи удалений и перемещений в журнал без полного снимка."""
+        progress_manager.save_interval = 1
+        progress_manager.flush_interval = 0.0
+        bookmark2 = Bookmark(title="B2", url="https://example2.com", date_added=None)
+        progress_manager.add_failed_bookmark(sample_bookmark, "Test error", ["Root"])
+        progress_manager.add_failed_bookmark(bookmark2, "Test error", ["Root"])
+        snapshot = progress_manager.progress_file.read_bytes()
+
+        progress_manager.move_failed_to_processed(sample_bookmark, "a.md", ["Root"])
+        progress_manager.remove_failed_bookmark(bookmark2.url)
+
+        # Снимок не переписывается, изменения попадают в журнал
+        assert progress_manager.progress_file.read_bytes() == snapshot
+        manager = ProgressManager(
+            output_dir=str(temp_dir),
+            bookmarks_file="test_bookmarks.json",
+            config_hash=progress_manager.config_hash
+        )
+        assert manager.load_progress() is True
+        assert manager.failed_bookmarks == []
+        assert [item.url for item in manager.processed_bookmarks] == [sample_bookmark.url]
+
+    def test_long_journal_is_compacted(self, progress_manager, sample_bookmark, monkeypatch):
+        """Тест объединения журнала со снимком, когда журнал длиннее состояния."""
+        monkeypatch.setattr("src.progress.PROGRESS_JOURNAL_COMPACT_MIN_RECORDS", 0)
+        progress_manager.save_interval = 1
+        progress_manager.flush_interval = 0.0
+        for i in range(3):
+            bookmark = Bookmark(title=f"B{i}", url=f"https://example{i}.com", date_added=None)
+            progress_manager.add_processed_bookmark(bookmark, f"{i}.md", ["Root"])
+        # Снимок и две пачки журнала (закладка и состояние): 4 записи при 3 в состоянии
+        assert progress_manager.journal_file.exists()
+
+        bookmark = Bookmark(title="B3", url="https://example3.com", date_added=None)
+        progress_manager.add_processed_bookmark(bookmark, "3.md", ["Root"])
+
+        assert not progress_manager.journal_file.exists()
+        with open(progress_manager.progress_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert len(data['processed_urls']) == 4
+
+    def test_load_progress_ignores_stale_and_truncated_journal(
+        self, progress_manager, sample_bookmark, temp_dir
+    ):
+        """Тест пропуска журнала чужого снимка и оборванной последней записи."""
+        progress_manager.save_interval = 1
+        progress_manager.flush_interval = 0.0
+        progress_manager.add_processed_bookmark(sample_bookmark, "a.md", ["Root"])
+        bookmark2 = Bookmark(title="B2", url="https://example2.com", date_added=None)
+        progress_manager.add_processed_bookmark(bookmark2, "b.md", ["Root"])
+
+        # Запись, прерванная сбоем, отбрасывается
+        with open(progress_manager.journal_file, "ab") as f:
+            f.write(b'{"kind": "processed", "url": "https://exa')
+
+        def load():
+            manager = ProgressManager(
+                output_dir=str(temp_dir),
+                bookmarks_file="test_bookmarks.json",
+                config_hash=progress_manager.config_hash
+            )
+            assert manager.load_progress() is True
+            return [item.url for item in manager.processed_bookmarks]
+
+        assert load() == ["https://example.com", "https://example2.com"]
+
+        # Журнал, оставшийся от предыдущего снимка, не применяется
+        journal = progress_manager.journal_file.read_bytes()
+        progress_manager.force_save()
+        progress_manager.journal_file.write_bytes(journal)
+
+        assert load() == ["https://example.com", "https://example2.com"]
+
+    def test_resume_after_torn_journal_keeps_new_records(
+        self, progress_manager, sample_bookmark, temp_dir
+    ):
+        """Тест сохранения записей, добавленных после загрузки оборванного журнала."""
+        progress_manager.save_interval = 1
+        progress_manager.flush_interval = 0.0
+        progress_manager.add_processed_bookmark(sample_bookmark, "a.md", ["Root"])
+        failed = Bookmark(title="F", url="https://failed.example.com", date_added=None)
+        progress_manager.add_failed_bookmark(failed, "Error", ["Root"])
+        with open(progress_manager.journal_file, "ab") as f:
+            f.write(b'{"kind": "processed", "url": "https://exa')
+
+        def resume():
+            manager = ProgressManager(
+                output_dir=str(temp_dir),
+                bookmarks_file="test_bookmarks.json",
+                config_hash=progress_manager.config_hash
+            )
+            manager.save_interval = 1
+            manager.flush_interval = 0.0
+            assert manager.load_progress() is True
+            return manager
+
+        manager = resume()
+        for i in range(5):
+            bookmark = Bookmark(title=f"B{i}", url=f"https://example{i}.com", date_added=None)
+            manager.add_processed_bookmark(bookmark, f"{i}.md", ["Root"])
+        # Удаление записывается в журнал тем же путем, что и добавления
+        manager.move_failed_to_processed(failed, "f.md", ["Root"])
+        expected = [item.url for item in manager.processed_bookmarks]
+        assert len(expected) == 7
+
+        reloaded = resume()
+        assert [item.url for item in reloaded.processed_bookmarks] == expected
+        assert reloaded.failed_bookmarks == []
+
+    def test_save_and_load_progress_pickle(self, temp_dir, sample_config, sample_bookmark):
+        """Тест сохранения и загрузки прогресса в бинарном формате."""
+        config_hash = calculate_config_hash(sample_config)
+        manager = ProgressManager(
+            output_dir=str(temp_dir),
+            bookmarks_file="test_bookmarks.json",
+            config_hash=config_hash,
+            progress_format="pickle"
+        )
+        assert manager.progress_file == temp_dir / "progress.pkl"
+
+        manager.add_processed_bookmark(sample_bookmark, "test_file.md", ["Root"])
+        manager.update_current_position(["Root"], 1, 2)
+        assert manager.force_save() is True
+
+        new_manager = ProgressManager(
+            output_dir=str(temp_dir),
+            bookmarks_file="test_bookmarks.json",
+            config_hash=config_hash,
+            progress_format="pickle"
+        )
+        assert new_manager.load_progress() is True
+        assert new_manager.processed_bookmarks[0].url == sample_bookmark.url
+        assert new_manager.current_position.bookmark_index == 1
+
+    def test_save_and_load_progress_without_orjson(self, progress_manager, sample_bookmark):
+        """Тест сохранения и загрузки JSON-прогресса через стандартный модуль json."""
+        with patch("src.progress.orjson", None):
+            progress_manager.add_processed_bookmark(sample_bookmark, "test_file.md", ["Root"])
+            assert progress_manager.force_save() is True
+            
+            with open(progress_manager.progress_file, encoding="utf-8") as f:
+                assert json.load(f)["processed_urls"][0]["url"] == sample_bookmark.url
+            
+            new_manager = ProgressManager(
+                output_dir=str(progress_manager.output_dir),
+                bookmarks_file="test_bookmarks.json",
+                config_hash=progress_manager.config_hash
+            )
+            assert new_manager.load_progress() is True
+        assert new_manager.processed_bookmarks[0].url == sample_bookmark.url
+
+    def test_failed_save_keeps_previous_progress(self, progress_manager, sample_bookmark):
+        """Тест сохранения прежнего файла прогресса при сбое записи."""
+        progress_manager.add_processed_bookmark(sample_bookmark, "test_file.md", ["Root"])
+        assert progress_manager.force_save() is True
+        saved_content = progress_manager.progress_file.read_bytes()
+
+        progress_manager.add_failed_bookmark(
+            Bookmark(title="Broken", url="https://broken.example.com", date_added=None),
+            "Error",
+            ["Root"],
+        )
+        with patch("src.progress.os.fsync", side_effect=OSError("disk failure")):
+            assert progress_manager.force_save() is False
+
+        # Файл прогресса не поврежден и содержит последнее успешное сохранение
+        assert progress_manager.progress_file.read_bytes() == saved_content
+
+    def test_invalid_progress_format(self, temp_dir):
+        """Тест отказа от неподдерживаемого формата файла прогресса."""
+        with pytest.raises(ValueError, match="Неподдерживаемый формат файла прогресса: xml"):
+            ProgressManager(
+                output_dir=str(temp_dir),
+                bookmarks_file="test_bookmarks.json",
+                config_hash="hash",
+                progress_format="xml"
+            )
 
 
 class TestCalculateConfigHash:
@@ -299,6 +657,20 @@ class TestCalculateConfigHash:
         # Хеши должны быть одинаковыми
         assert hash1 == hash3
 
+    def test_calculate_config_hash_is_stable(self):
+        """Тест неизменности хеша: от него зависит совместимость сохраненного прогресса."""
+        config = Mock()
+        config.llm_model = "gpt-4o-mini"
+        config.llm_max_tokens = 1000
+        config.llm_temperature = 0.7
+        config.output_dir = "./test_output"
+        config.markdown_include_metadata = True
+        config.generate_mermaid_diagram = True
+
+        assert calculate_config_hash(config) == (
+            "83299b7cfc5ad967b5cfead4f82b707d6d7b84b636d6132957c51eec6d4d8881"
+        )
+
 
 class TestProcessedBookmark:
     """Тесты для класса ProcessedBookmark."""
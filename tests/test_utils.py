@@ -192,6 +192,12 @@ class TestDateUtils:
         result = DateUtils.chrome_timestamp_to_datetime(invalid_timestamp)
         
         assert result is None
+
+    def test_chrome_timestamp_to_datetime_out_of_range(self):
+        """Тест временной метки за пределами диапазона datetime."""
+        result = DateUtils.chrome_timestamp_to_datetime("9" * 30)
+
+        assert result is None
     
     def test_format_duration_seconds(self):
         """Тест форматирования продолжительности в секундах."""
@@ -4,9 +4,12 @@
 """
 
 import pytest
+from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 
 from src.config import Config
+from src.models import ProcessedPage
 from src.writer import FileSystemWriter
 
 
@@ -160,4 +163,27 @@ class TestFileSystemWriter:
         total_path = long_parent_path / f"{result}.md"
         assert len(str(total_path).encode('utf-8')) <= 255
         # Должно быть обрезано с учетом длины родительского пути
-        assert len(result.encode('utf-8')) < 100  # Должно быть усечено
\ No newline at end of file
+        assert len(result.encode('utf-8')) < 100  # Должно быть усечено
+
+    def test_write_markdown_creates_directory_once(self, config: Config, tmp_path: Path):
+        """Тестирует, что директория создается один раз для нескольких файлов."""
+        config.output_dir = str(tmp_path / "output")
+        writer = FileSystemWriter(config)
+        folder = tmp_path / "output" / "Folder"
+        pages = [
+            ProcessedPage(
+                url=f"https://example{i}.com",
+                title=f"Page {i}",
+                summary="Summary",
+                fetch_date=datetime.now(),
+                status="success",
+            )
+            for i in range(3)
+        ]
+
+        with patch.object(Path, "mkdir", autospec=True, side_effect=Path.mkdir) as mock_mkdir:
+            for i, page in enumerate(pages):
+                writer.write_markdown(page, folder / f"page{i}.md")
+
+        assert mock_mkdir.call_count == 1
+        assert len(list(folder.glob("*.md"))) == 3